@@ -1,11 +1,106 @@
-from flask import Flask, redirect, render_template, url_for
+from decimal import Decimal
+from typing import Any, Callable
+
+from config import CACHE_ENCODED_SNAPSHOT
+from flask import Flask, Response, abort, jsonify, redirect, render_template, request, url_for
+from flask.json.provider import JSONProvider
+from hashlib import sha1
 from pathlib import Path
 
-from controller.event import EventResults
+from controller.event import EventResults, ResultFilters, get_results_snapshot
 from controller import player
+from controller.version import DataVersion, get_data_version
+import instrumentation
+from instrumentation import phase
+
+try:
+    import orjson  # optional: a much faster encoder, which writes date & datetime natively
+except ImportError:
+    orjson = None
+
+
+def _json_default(o: Any) -> Any:
+    """What orjson can't serialize itself, handled like Flask's default provider does"""
+    if isinstance(o, Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask's JSON provider backed by orjson.  Unlike the default provider, dates & datetimes are written as ISO 8601
+    (not HTTP dates) & dict keys keep their order instead of being sorted.  Responses are encoded straight to bytes."""
+    mimetype = 'application/json'
+    compact: bool | None = None  # None: indent in debug mode, like the default provider
+
+    @staticmethod
+    def _encode(obj: Any, option: int = 0) -> bytes:
+        return orjson.dumps(obj, default=_json_default, option=option | orjson.OPT_NON_STR_KEYS)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """The stdlib's indent & sort_keys kwargs are honored; orjson only indents by 2"""
+        option = ((orjson.OPT_INDENT_2 if kwargs.get('indent') else 0) |
+                  (orjson.OPT_SORT_KEYS if kwargs.get('sort_keys') else 0))
+        return self._encode(obj, option).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        option = orjson.OPT_APPEND_NEWLINE | (orjson.OPT_INDENT_2 if indent else 0)
+        return self._app.response_class(self._encode(obj, option), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+if orjson:
+    app.json = OrjsonProvider(app)
 basedir = Path(__file__).parent.resolve()
+instrumentation.init_app(app)
+
+
+def encode_json(payload: Any) -> bytes:
+    """The payload as a JSON response body, encoded by the app's provider"""
+    return app.json.response(payload).get_data()
+
+def snapshot_payload(attribute: str) -> Callable[[DataVersion], Any]:
+    """A conditional_json payload builder for an attribute of the results snapshot.  W CACHE_ENCODED_SNAPSHOT, it's
+    encoded once per data version & the same bytes are sent until the data changes."""
+    def build_payload(version: DataVersion) -> Any:
+        snapshot = get_results_snapshot(version)
+        return snapshot.encoded(attribute, encode_json) if CACHE_ENCODED_SNAPSHOT else getattr(snapshot, attribute)
+    return build_payload
+
+
+def conditional_json(build_payload: Callable[[DataVersion], Any]) -> Response:
+    """Answers with a 304 when the client's If-None-Match (or If-Modified-Since) matches the current data version,
+    without querying the ORM or serializing anything; otherwise builds & sends the payload with ETag/Last-Modified.
+    The payload builder may return (payload, headers), like a Flask view, & the payload may be already encoded JSON
+    bytes.  The query string is part of the ETag."""
+    with phase('version'):
+        version = get_data_version()
+    etag = version.etag if not request.query_string else sha1(version.etag.encode() + request.query_string).hexdigest()
+    last_modified = version.last_modified
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = bool(request.if_modified_since and last_modified and request.if_modified_since >= last_modified)
+
+    if not_modified:
+        response = Response(status=304)
+    else:
+        with phase('build'):
+            payload = build_payload(version)
+        payload, headers = payload if isinstance(payload, tuple) else (payload, {})
+        response = Response(payload, mimetype=app.json.mimetype) if isinstance(payload, bytes) else jsonify(payload)
+        response.headers.update(headers)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True  # clients may store it, but must revalidate each time
+    return response
+
 
 @app.route('/')
 def home():
@@ -21,18 +116,31 @@ def dg_admin():
     return render_template("dg2.html")
 
 @app.route('/api/players')
-def all_players() -> list[dict]:
-    return player.get_all_players()
+def all_players() -> Response:
+    return conditional_json(lambda version: player.get_all_players())
 
 @app.route('/api/results_flat')
-def event_results_flat() -> list[dict]:
-    results = EventResults()
-    return results.results_flat
+def event_results_flat() -> Response:
+    """Accepts optional filters: division, year, start_date, end_date, tourney, country, winner_country, winner (PDGA#)
+    & designation; a fields= projection of the flattened keys; & keyset pagination via limit & after.
+    When there are more rows, the X-Next-Cursor header holds the value to pass as after= for the next page.
+    Unknown parameters are a 400; when nothing is filtered, the response comes from the results snapshot."""
+    try:
+        filters = ResultFilters.from_args(request.args)
+    except ValueError as e:
+        abort(400, f'Invalid filter: {e}')
+    if filters == ResultFilters():
+        return conditional_json(snapshot_payload('results_flat'))
+
+    def build_payload(version: DataVersion):
+        results = EventResults(filters)
+        headers = {'X-Next-Cursor': results.next_cursor} if results.next_cursor else {}
+        return results.results_flat, headers
+    return conditional_json(build_payload)
 
 @app.route('/api/event_results')
-def event_results() -> list[dict[str: dict]]:
-    results = EventResults()
-    return results.results
+def event_results() -> Response:
+    return conditional_json(snapshot_payload('results'))
 
 
 if __name__ == "__main__":
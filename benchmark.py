@@ -0,0 +1,394 @@
+"""Benchmarks for the hot paths. Run: python benchmark.py [name ...] [--scales 1,10] [--record FILE]
+No names runs them all.  The suite benchmark needs DB_MODE=local: it rebuilds the local SQLite database from
+synthetic_data at each scale.  --record appends this run's timings to a JSON lines file & flags the cases that got
+slower than the previous run recorded there.
+Correctness checks (e.g. statement counts) are pytest tests in tests/, against the backup data.  The benchmarks stay
+a script rather than pytest-benchmark cases: they sweep data scales, each rebuilding the database, which doesn't fit
+the tests' one shared database, & --record keeps the history across runs that pytest-benchmark would need a plugin
+setup for."""
+import argparse
+from datetime import date, datetime, timedelta
+import json
+import platform
+import subprocess
+from pathlib import Path
+import random
+import time
+import tracemalloc
+
+from config import PDGA_CACHE_DIR
+
+from streamlit_data import StreamlitData
+
+REGRESSION_RATIO = 1.25  # --record flags a case this much slower than its last recorded time
+REGRESSION_MIN_SECONDS = 0.001  # ... & slower by at least this much, so timer noise on tiny cases isn't flagged
+RESULTS: list[dict] = []  # every recorded measurement of this run
+_bench_name = ''
+scales: tuple[float, ...] = (1, 10)  # of today's data size, for the suite; --scales overrides
+
+DASHBOARD_FILTERS = ['player_w_flag', 'country_w_flag', 'player_division',
+                     'event_designation_map', 'tourney_name', 'event_state', 'event_country_name']
+
+
+def timed(func, repeat: int = 3) -> float:
+    """Returns the best wall time in seconds of a few runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def record(case: str, seconds: float) -> float:
+    """Keeps a measurement of the running benchmark for --record; returns the seconds"""
+    RESULTS.append({'bench': _bench_name, 'case': case, 'seconds': seconds})
+    return seconds
+
+
+def peak_memory(func) -> int:
+    """Returns the peak bytes allocated while running func"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def fake_event_page(pdga_event_id: int, divisions: tuple[str, ...] = ('MPO', 'FPO', 'MA1', 'MA2', 'MA40', 'FA1'),
+                    players_per_division: int = 80, end_date: date = date(2016, 6, 26),
+                    winner_ids: dict[str, int] = None) -> str:
+    """A pdga.com-shaped event page: header, status table & one results table per division.
+    winner_ids optionally sets the PDGA# in first place per division."""
+    rnd = random.Random(pdga_event_id)
+    header = ('<tr><th>Place</th><th>Points</th><th>Name</th><th>PDGA#</th><th>Rating</th><th>Par</th>'
+              '<th>Rd1</th><th></th><th>Rd2</th><th></th><th>Rd3</th><th></th><th>Total</th><th>Prize</th></tr>')
+    parts = [f'<html><body><h1>Fake Open {pdga_event_id}</h1>',
+             f'<li class="tournament-date">Date: {end_date - timedelta(days=2):%d-%b} to {end_date:%d-%b-%Y}</li>',
+             '<li class="tournament-location">Location: Leicester, Massachusetts, United States</li>',
+             '<table class="tournament-status"><tr><th>Status</th><th>Players</th><th>Purse</th></tr>'
+             '<tr><td class="status">Event complete; official ratings processed.</td>'
+             f'<td class="players">{len(divisions) * players_per_division}</td><td class="purse">$1</td></tr></table>']
+    for division in divisions:
+        parts.append(f'<details class="division" id="{division}"><summary>{division}</summary>'
+                     f'<table class="results">{header}')
+        for place in range(1, players_per_division + 1):
+            pdga_id, par = rnd.randrange(1000, 250000), place - 15
+            if place == 1 and division in (winner_ids or {}):
+                pdga_id = winner_ids[division]
+            rounds = ''.join(f'<td class="round">{rnd.randrange(50, 70)}</td><td class="round-rating">1000</td>'
+                             for _ in range(3))
+            parts.append(f'<tr><td>{place}</td><td>{place % 7 or ""}</td><td>Player {pdga_id}</td><td>{pdga_id}</td>'
+                         f'<td>{1050 - place}</td><td>{"E" if par == 0 else par}</td>{rounds}<td>{180 + place}</td>'
+                         f'<td>{"$1,250" if place <= 10 else ""}</td></tr>')
+        parts.append('</table></details>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def saved_event_pages() -> list[str]:
+    """Event pages saved in the PDGA client's disk cache, else a few fake ones"""
+    pages = []
+    for cache_file in Path(PDGA_CACHE_DIR or '.pdga_cache').glob('*.json'):
+        entry = json.loads(cache_file.read_text(encoding='utf-8'))
+        if '/tour/event/' in entry['url']:
+            pages.append(entry['text'])
+    return pages or [fake_event_page(i) for i in range(3)]
+
+
+def fake_results_flat(seasons: int, winners: int, events_per_season: int = 40) -> list[dict]:
+    """Minimal results_flat-shaped rows: enough columns for StreamlitData"""
+    rnd = random.Random(0)
+    rows = []
+    for year in range(2016, 2016 + seasons):
+        for event_idx in range(events_per_season):
+            pdga_id = rnd.randrange(winners)
+            rows.append({'event_id': len(rows) + 1, 'event_year': year,
+                         'event_end_date': date(year, 1 + event_idx % 12, 1 + event_idx // 12),
+                         'event_winner_id': pdga_id, 'event_designation': 'Elite', 'event_state': 'MA',
+                         'event_country_name': 'United States', 'tourney_name': f'Tourney {event_idx}',
+                         'player_full_name': f'Player {pdga_id}', 'player_division': 'MPO' if pdga_id % 2 else 'FPO',
+                         'country_name': 'United States', 'country_flag_emoji': ':flag-us:'})
+    return rows
+
+
+def bench_group_data_by_player_year() -> None:
+    """StreamlitData.group_data_by_player_year should grow with the player-year grid, not grid × rows"""
+    print('seasons  winners     rows  seconds')
+    for seasons, winners in ((8, 50), (16, 100), (32, 200), (64, 400)):
+        data = StreamlitData(fake_results_flat(seasons, winners), filters=DASHBOARD_FILTERS, groupers={})
+        seconds = record(f'{seasons}x{winners}', timed(data._group_data_by_player_year))  # bypasses the memo
+        print(f'{seasons:>7}  {winners:>7}  {len(data.filtered_data):>7}  {seconds:.4f}')
+
+
+def bench_filter_data() -> None:
+    """StreamlitData.filter_data with the dashboard's typical division + time period + winner filters"""
+    print('    rows  seconds')
+    for seasons, winners in ((8, 50), (80, 500), (800, 5000)):
+        data = StreamlitData(fake_results_flat(seasons, winners), filters=DASHBOARD_FILTERS, groupers={})
+        filters = {'player_division': 'MPO', 'time_period': (date(2018, 1, 1), date(2030, 12, 31)),
+                   'player_w_flag': data.filter_dropdowns['player_w_flag'][:10], 'event_state': []}
+        seconds = record(f'{len(data.data)} rows', timed(lambda: data._filter_data(  # bypasses the memo
+            filters, sort_key='event_end_date', time_period_col='event_end_date')))
+        print(f'{len(data.data):>8}  {seconds:.4f}')
+
+
+def bench_parse_event_page() -> None:
+    """parse_event_page per parser backend: every division vs. only the status block & MPO/FPO"""
+    from controller.event_pdga import RESULT_DIVISIONS, parse_event_page
+    pages = saved_event_pages()
+    print(f'{len(pages)} pages, {sum(map(len, pages)) // len(pages):,} chars avg')
+    print('parser       divisions  seconds/page  peak KiB/page')
+    for parser in ('html.parser', 'lxml'):
+        for divisions in (None, RESULT_DIVISIONS):
+            def parse_all():
+                for i, page in enumerate(pages):
+                    parse_event_page(page, i, divisions, parser)
+            try:
+                seconds = record(f"{parser} {'MPO/FPO' if divisions else 'all'}", timed(parse_all) / len(pages))
+            except Exception as e:  # e.g. lxml isn't installed
+                print(f'{parser:<12} {type(e).__name__}: {e}')
+                break
+            kib = peak_memory(parse_all) / 1024 / len(pages)
+            print(f"{parser:<12} {'MPO/FPO' if divisions else 'all':<9}  {seconds:12.4f}  {kib:13,.0f}")
+
+
+def _orm_reads() -> dict:
+    """The ORM versions of the read paths: hydrate instances in a committing session, then k_v each one"""
+    from db import get_db_session
+    from models import Country, Event, Player, Season, Tournament
+
+    def orm_all(model):
+        def read():
+            with get_db_session() as s:
+                return [e.k_v for e in s.query(model).all()]
+        return read
+
+    def orm_event_results():
+        with get_db_session() as s:
+            query = (s.query(Player, Event, Tournament, Country).
+                     join(Player, Event.winner_id == Player.pdga_id).
+                     join(Tournament, Event.tourney_id == Tournament.id).
+                     join(Country, Player.country_code == Country.code))
+            return [{'event': event.k_v, 'player': player.k_v, 'country': country.k_v, 'tourney': tourney.k_v}
+                    for player, event, tourney, country in query.all()]
+
+    return {'players': orm_all(Player), 'events': orm_all(Event), 'tourneys': orm_all(Tournament),
+            'seasons': orm_all(Season), 'event_results': orm_event_results}
+
+
+def bench_read_paths() -> None:
+    """Read endpoints against the configured database: ORM instances + k_v vs. read-only Core row mappings"""
+    from controller.event import EventResults, get_all_events
+    from controller.player import get_all_players
+    from controller.season import get_all_seasons
+    from controller.tournament import get_all_tourneys
+    core = {'players': get_all_players, 'events': get_all_events, 'tourneys': get_all_tourneys,
+            'seasons': get_all_seasons, 'event_results': lambda: EventResults().results}
+    print('read           path   rows     rows/sec  peak KiB')
+    for name, orm_read in _orm_reads().items():
+        for path, read in (('orm', orm_read), ('core', core[name])):
+            rows = len(read())
+            seconds = record(f'{name} {path}', timed(read))
+            print(f'{name:<14} {path:<5} {rows:>5}  {rows / seconds:11,.0f}  {peak_memory(read) / 1024:8,.0f}')
+
+
+def bench_statement_counts() -> None:
+    """SQL statements per read as the event count grows: the ORM k_v path lazy loads 2 relationships per event,
+    the others stay constant (which tests/test_statement_counts.py asserts)"""
+    from controller.event import EventResults, ResultFilters
+    from db import count_statements, get_db_session
+    from models import Event
+    from sqlalchemy.orm import joinedload
+
+    def orm_events(limit, *options):
+        with get_db_session() as s:
+            return [e.k_v for e in s.query(Event).options(*options).limit(limit)]
+
+    reads = {'orm k_v (lazy)': lambda n: orm_events(n),
+             'orm k_v (joinedload)': lambda n: orm_events(n, joinedload(Event.tourney), joinedload(Event.country)),
+             'EventResults': lambda n: EventResults(ResultFilters(limit=n)).results}
+    print('read                  ' + ''.join(f'{n:>7}' for n in (1, 10, 100)) + '  statements for n events')
+    for name, read in reads.items():
+        counts = []
+        for n in (1, 10, 100):
+            with count_statements() as statements:
+                read(n)
+            counts.append(len(statements))
+        print(f"{name:<22}" + ''.join(f'{c:>7}' for c in counts))
+
+
+def bench_snapshot_read() -> None:
+    """Reading backup_data.py (compile & exec the literals) vs. a db_snapshot of the same rows, at today's size
+    & w a fake 80 player leaderboard embedded in every event"""
+    import tempfile
+    from db_snapshot import read_snapshot, snapshot_rows, write_snapshot
+    from local_db import backup_rows
+
+    rows_by_table = backup_rows()
+    rnd = random.Random(0)
+    with_results = {**rows_by_table, 'dg_event': [
+        {**event, 'results': [{'Place': place, 'PDGA#': rnd.randrange(1000, 250000), 'Name': f'Player {place}',
+                               'Par': place - 15, 'Rd1': 60, 'Rd2': 61, 'Rd3': 62, 'Total': 183 + place}
+                              for place in range(1, 81)]} for event in rows_by_table['dg_event']]}
+    print('data          format           KiB  seconds (all rows)  seconds (open, lazy)')
+    for label, data in (('backup', rows_by_table), ('w leaderboards', with_results)):
+        with tempfile.TemporaryDirectory() as tmp:
+            module = Path(tmp) / 'backup_module.py'
+            module.write_text('\n'.join(f'{name} = {rows!r}' for name, rows in data.items()), encoding='utf-8')
+            source = module.read_text(encoding='utf-8')
+
+            def exec_literals():
+                exec(compile(source, str(module), 'exec'), {'datetime': __import__('datetime')})
+            seconds = record(f'{label} python literal', timed(exec_literals))
+            print(f'{label:<14} python literal  {module.stat().st_size / 1024:8,.0f}  {seconds:18.4f}')
+
+            write_snapshot(tmp, data)
+            kib = sum(f.stat().st_size for f in Path(tmp).glob('*.arrow')) / 1024
+            all_rows = record(f'{label} arrow snapshot', timed(
+                lambda: {name: snapshot_rows(name, table) for name, table in read_snapshot(tmp).items()}))
+            open_lazy = timed(lambda: read_snapshot(tmp))
+            print(f'{label:<14} arrow snapshot  {kib:8,.0f}  {all_rows:18.4f}  {open_lazy:20.4f}')
+
+
+class _PageClient:
+    """Stands in for the PDGA client, serving one canned event page"""
+    def __init__(self, html: str):
+        self.html = html
+
+    def get_text(self, path: str, params: dict = None) -> str:
+        return self.html
+
+    def iter_text(self, path: str, params: dict = None, chunk_size: int = 16 * 1024):
+        yield self.html
+
+
+def _bench_write_event(scale: float) -> None:
+    """write_event_to_db of one new event, scraped from a canned page, into the synthetic database"""
+    from controller import pdga_client
+    from controller.event import write_event_to_db
+    from controller.leaderboard import refresh_player_year_aggregates
+    from db import get_db_session
+    from models import Event, Player, Tournament
+    from sqlalchemy import delete, func, select
+
+    with get_db_session() as s:
+        winner_id = s.scalar(select(Player.pdga_id).where(Player.division == 'MPO').limit(1))
+        tourney_id = s.scalar(select(func.min(Tournament.id)))
+    real_client, seconds = pdga_client._client, []
+    try:
+        for i in range(3):
+            end_date = date(2099, 6, 10 + i)  # a year of its own, so nothing collides & cleanup is simple
+            pdga_client._client = _PageClient(fake_event_page(90000 + i, ('MPO', 'FPO'), 120, end_date,
+                                                              {'MPO': winner_id}))
+            start = time.perf_counter()
+            write_event_to_db(90000 + i, 'Elite', tourney_id, 'MPO')
+            seconds.append(time.perf_counter() - start)
+    finally:
+        pdga_client._client = real_client
+        with get_db_session() as s:
+            s.execute(delete(Event).where(Event.end_date >= date(2099, 1, 1)))
+        refresh_player_year_aggregates([2099])
+    print(f'{scale:>6g}x  {"write_event_to_db":<43}{record(f"{scale:g}x write_event_to_db", min(seconds)):9.4f}')
+
+
+def bench_suite() -> None:
+    """The API & dashboard computations on synthetic data at each of the --scales: EventResults.results_flat,
+    StreamlitData, the avg finish & top X queries (over event ids & from the aggregates), write_event_to_db, and the
+    Flask endpoints through the test client.  Rebuilds the local SQLite database, so it only runs w DB_MODE=local."""
+    from db import engine
+    if engine.dialect.name != 'sqlite':
+        print('Skipped: the suite rebuilds the database, so set DB_MODE=local (& LOCAL_DB_PATH to a scratch file)')
+        return
+    import app as flask_app
+    from controller import event
+    from controller.event import EventResults
+    from controller.leaderboard import get_avg_finish_leaders, get_top_finish_leaders
+    from controller.result import get_avg_finishes, get_top_finish_counts
+    from controller.version import invalidate_data_version
+    from synthetic_data import load_synthetic
+
+    client = flask_app.app.test_client()
+    print(' scale  case                                       seconds')
+    for scale in scales:
+        start = time.perf_counter()
+        counts = load_synthetic(scale)
+        invalidate_data_version()
+        loaded = f'load {counts["dg_event"]:,} events & {counts["dg_result"]:,} results'
+        print(f'{scale:>6g}x  {loaded:<43}{time.perf_counter() - start:9.4f}')
+        results_flat = EventResults().results_flat
+        event_ids = [e['event_id'] for e in results_flat if e['player_division'] == 'MPO']
+        data = StreamlitData(results_flat, filters=DASHBOARD_FILTERS, groupers={})
+        filters = {'player_division': 'MPO', 'time_period': (date(2018, 1, 1), date(2024, 12, 31))}
+
+        def reset_snapshot_then(path: str):
+            def get():
+                event._snapshot = None
+                return client.get(path)
+            return get
+
+        etag = client.get('/api/results_flat').headers['ETag']
+        cases = {'EventResults.results_flat': lambda: EventResults().results_flat,
+                 'StreamlitData()': lambda: StreamlitData(results_flat, filters=DASHBOARD_FILTERS, groupers={}),
+                 'StreamlitData._filter_data': lambda: data._filter_data(filters, sort_key='event_end_date',
+                                                                         time_period_col='event_end_date'),
+                 'StreamlitData._group_data_by_player_year': data._group_data_by_player_year,
+                 'get_avg_finishes (event ids)': lambda: get_avg_finishes(event_ids, min_events=10, limit=10),
+                 'get_top_finish_counts (event ids)': lambda: get_top_finish_counts(10, event_ids, limit=10),
+                 'get_avg_finish_leaders': lambda: get_avg_finish_leaders(['MPO'], (2016, 2024), 10, 10),
+                 'get_top_finish_leaders': lambda: get_top_finish_leaders(10, ['MPO'], (2016, 2024), 10),
+                 'GET /api/results_flat (rebuild)': reset_snapshot_then('/api/results_flat'),
+                 'GET /api/results_flat (snapshot)': lambda: client.get('/api/results_flat'),
+                 'GET /api/results_flat (304)': lambda: client.get('/api/results_flat',
+                                                                  headers={'If-None-Match': etag}),
+                 'GET /api/results_flat?division&year': lambda: client.get(
+                     '/api/results_flat?division=FPO&year=2020&limit=50'),
+                 'GET /api/players': lambda: client.get('/api/players')}
+        for case, func in cases.items():
+            print(f'{scale:>6g}x  {case:<43}{record(f"{scale:g}x {case}", timed(func)):9.4f}')
+        _bench_write_event(scale)
+
+
+BENCHMARKS = {'group_data_by_player_year': bench_group_data_by_player_year,
+              'filter_data': bench_filter_data,
+              'parse_event_page': bench_parse_event_page,
+              'read_paths': bench_read_paths,
+              'statement_counts': bench_statement_counts,
+              'snapshot_read': bench_snapshot_read,
+              'suite': bench_suite}
+
+
+def record_run(path: str) -> None:
+    """Flags this run's cases that are REGRESSION_RATIO slower than the last run in the file, then appends this run"""
+    history = Path(path)
+    runs = [json.loads(line) for line in history.read_text(encoding='utf-8').splitlines()] if history.exists() else []
+    previous = {}
+    for run in runs:
+        previous.update({(r['bench'], r['case']): r['seconds'] for r in run['results']})
+    slower = [(r, before) for r in RESULTS if (before := previous.get((r['bench'], r['case']))) is not None
+              and r['seconds'] > before * REGRESSION_RATIO and r['seconds'] - before > REGRESSION_MIN_SECONDS]
+    for r, before in slower:
+        print(f"REGRESSION {r['bench']} / {r['case']}: {before:.4f}s -> {r['seconds']:.4f}s")
+    print(f'{len(slower)} of {len(RESULTS)} cases slower than {REGRESSION_RATIO}x their last recorded time')
+    commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    with history.open('a', encoding='utf-8') as f:
+        f.write(json.dumps({'at': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+                            'python': platform.python_version(), 'results': RESULTS}) + '\n')
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('names', nargs='*', metavar='name', help=', '.join(BENCHMARKS))
+    arg_parser.add_argument('--scales', type=lambda v: tuple(float(s) for s in v.split(',')), default=scales,
+                            help='comma-separated multiples of today\'s data size for the suite, e.g. 1,10,100')
+    arg_parser.add_argument('--record', metavar='FILE', help='a JSON lines history of runs, e.g. bench_history.jsonl')
+    args = arg_parser.parse_args()
+    if unknown := [name for name in args.names if name not in BENCHMARKS]:
+        arg_parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    scales = args.scales
+    for _bench_name in args.names or BENCHMARKS:
+        print(f'== {_bench_name}')
+        BENCHMARKS[_bench_name]()
+    if args.record:
+        record_run(args.record)
@@ -3,7 +3,36 @@ from dotenv import load_dotenv  # pip install python-dotenv
 import os
 
 load_dotenv()
-DB_CONN_STR = os.getenv('DB_PROD_CONN_STR')
-CONN_STR_UNPACKED = os.getenv('CONN_STR')
+# DB_MODE=local swaps Postgres for a SQLite file seeded from backup_data.py (build it w: python local_db.py)
+DB_MODE = os.getenv('DB_MODE', 'prod')
+LOCAL_DB_PATH = os.getenv('LOCAL_DB_PATH', 'local_dg.db')
+DB_CONN_STR = f'sqlite:///{LOCAL_DB_PATH}' if DB_MODE == 'local' else os.getenv('DB_PROD_CONN_STR')
 NOW = datetime.now()
 TODAY = date.today()
+
+# pdga.com scraping: be polite & cache what we can
+PDGA_BASE_URL = os.getenv('PDGA_BASE_URL', 'https://www.pdga.com')
+PDGA_MAX_CONCURRENCY = int(os.getenv('PDGA_MAX_CONCURRENCY', 4))
+PDGA_MIN_INTERVAL_SECONDS = float(os.getenv('PDGA_MIN_INTERVAL_SECONDS', 0.25))  # between the starts of requests
+PDGA_TIMEOUT_SECONDS = float(os.getenv('PDGA_TIMEOUT_SECONDS', 20))
+PDGA_RETRIES = int(os.getenv('PDGA_RETRIES', 3))
+PDGA_BACKOFF_FACTOR = float(os.getenv('PDGA_BACKOFF_FACTOR', 1))
+PDGA_CACHE_DIR = os.getenv('PDGA_CACHE_DIR', '.pdga_cache')  # an empty string disables the disk cache
+
+# SQLAlchemy connection pool, per process (i.e. per gunicorn worker)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv('DB_POOL_TIMEOUT_SECONDS', 30))  # wait for a free connection, then error
+DB_POOL_RECYCLE_SECONDS = int(os.getenv('DB_POOL_RECYCLE_SECONDS', 1800))  # reconnect before the server drops idle ones
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# Request instrumentation (instrumentation.py): when enabled, a request w an X-Profile: 1 header gets a sampled profile
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILER_INTERVAL_SECONDS = float(os.getenv('PROFILER_INTERVAL_SECONDS', 0.005))  # ~ the GIL switch interval
+
+# API: how long a process reuses the data version (max lmt/created_ts & counts) before asking the db again.
+# Writes made by this process invalidate it at once; others' writes show up within this many seconds.
+DATA_VERSION_TTL_SECONDS = float(os.getenv('DATA_VERSION_TTL_SECONDS', 2))
+
+# API JSON: keep each results snapshot's encoded bytes, so unchanged data is served w/o re-serializing it
+CACHE_ENCODED_SNAPSHOT = os.getenv('CACHE_ENCODED_SNAPSHOT', 'true').lower() in ('1', 'true', 'yes')
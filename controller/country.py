@@ -1,8 +1,58 @@
-from db import get_db_session
+from hashlib import md5
+from threading import Lock
+import time
+
+from db import engine, get_db_session
 from models import Country
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from states import state_codes_by_name
+
+COUNTRY_INDEX_CHECK_SECONDS = 300  # how often the cached index re-checks whether the country table changed
 
 def get_countries() -> dict[str: dict]:
     with get_db_session() as s:
         res: list[Country] = s.query(Country).all()
         return {c.code: {'name': c.name, 'flag_emoji_code': c.flag_emoji_code, 'flag_emoji': c.flag_emoji} for c in res}
 
+
+_country_codes_by_name: dict[str, str] | None = None
+_country_fingerprint: str | None = None
+_country_checked_at = 0.0
+_country_lock = Lock()
+
+def _get_country_fingerprint() -> str:
+    """A hash of every country's code & name, so it changes whenever a country is added, removed or renamed.
+    Postgres hashes them server side, w/o sending the rows; SQLite (local mode) sends the ~250 rows to hash here."""
+    code_name = Country.code + ':' + func.coalesce(Country.name, '')
+    with get_db_session() as s:
+        if engine.dialect.name == 'postgresql':
+            return s.scalar(select(func.md5(func.string_agg(code_name, aggregate_order_by(literal(','),
+                                                                                          Country.code)))))
+        return md5(repr(s.execute(select(code_name).order_by(Country.code)).scalars().all()).encode()).hexdigest()
+
+def invalidate_country_index() -> None:
+    global _country_codes_by_name
+    with _country_lock:
+        _country_codes_by_name = None
+
+def get_country_codes_by_name() -> dict[str, str]:
+    """Process-wide {country name: code} index. It is rebuilt when the country table's fingerprint changes,
+    which is checked at most every COUNTRY_INDEX_CHECK_SECONDS (or after invalidate_country_index)."""
+    global _country_codes_by_name, _country_fingerprint, _country_checked_at
+    with _country_lock:
+        if _country_codes_by_name is not None and time.monotonic() - _country_checked_at < COUNTRY_INDEX_CHECK_SECONDS:
+            return _country_codes_by_name
+        fingerprint = _get_country_fingerprint()
+        if _country_codes_by_name is None or fingerprint != _country_fingerprint:
+            _country_codes_by_name = {data['name']: code for code, data in get_countries().items()}
+            _country_fingerprint = fingerprint
+        _country_checked_at = time.monotonic()
+        return _country_codes_by_name
+
+def country_code_from_name(country_name: str) -> str | None:
+    return get_country_codes_by_name().get(country_name)
+
+def state_code_from_name(state_name: str | None) -> str:
+    """US state code from its full name, else ''"""
+    return state_codes_by_name.get(state_name, '')
@@ -1,45 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from datetime import date
 import json
+from typing import Any, Callable, ClassVar, Mapping
+from threading import Lock
 
-from db import get_db_session, get_cursor_w_commit
+from config import PDGA_MAX_CONCURRENCY
+from db import get_db_session, get_cursor_w_commit, get_read_connection, read_mappings
 from models import Country, Event, Player, Tournament
 from .event_pdga import PDGAEvent
-from .player import get_all_players
+from .leaderboard import refresh_player_year_aggregates
+from .player import Division
+from .player_import import PlayerImportRow, insert_players, resolve_players
+from .result import RESULT_KEY_COL_MAP, replace_event_results, result_rows
 from .season import get_all_seasons
-from sqlalchemy import desc
-from .tournament import get_all_tourneys
+from sqlalchemy import Column, desc, exists, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from .version import DataVersion, get_data_version, invalidate_data_version
+
+
+@dataclass(frozen=True)
+class ResultFilters:
+    """Filters, projection & keyset pagination pushed down into the event results query.
+    Empty tuples & Nones mean "no filter".  The cursor is the (end_date, event id) of the last row of the prior page."""
+    divisions: tuple[str, ...] = ()
+    start_date: date | None = None
+    end_date: date | None = None
+    tourney_names: tuple[str, ...] = ()
+    country_codes: tuple[str, ...] = ()
+    winner_country_codes: tuple[str, ...] = ()
+    winner_ids: tuple[int, ...] = ()
+    designations: tuple[str, ...] = ()
+    fields: tuple[str, ...] = ()
+    after: tuple[date, int] | None = None
+    limit: int | None = None
+
+    ARG_KEYS: ClassVar[frozenset[str]] = frozenset({'division', 'year', 'start_date', 'end_date', 'tourney', 'country',
+                                                    'winner_country', 'winner', 'designation', 'fields', 'after',
+                                                    'limit'})
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> 'ResultFilters':
+        """Parses query-string style args, such as ?division=FPO&year=2023&fields=event_end_date,player_full_name.
+        List values are comma-separated. Raises a ValueError on unknown keys or fields, or malformed values."""
+        if unknown := sorted(set(args) - cls.ARG_KEYS):
+            raise ValueError(f"unknown parameter(s) {', '.join(unknown)}; "
+                             f"expected any of {', '.join(sorted(cls.ARG_KEYS))}")
+
+        def as_list(key: str) -> tuple[str, ...]:
+            return tuple(v.strip() for v in args.get(key, '').split(',') if v.strip())
+
+        start_date = date.fromisoformat(args['start_date']) if args.get('start_date') else None
+        end_date = date.fromisoformat(args['end_date']) if args.get('end_date') else None
+        if args.get('year'):
+            year = int(args['year'])
+            start_date = max(start_date or date.min, date(year, 1, 1))
+            end_date = min(end_date or date.max, date(year, 12, 31))
+        after = None
+        if args.get('after'):
+            after_date, _, after_id = args['after'].partition('_')
+            after = date.fromisoformat(after_date), int(after_id)
+        limit = int(args['limit']) if args.get('limit') else None
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be a positive integer')
+        fields = as_list('fields')
+        if unknown_fields := sorted(set(fields) - EventResults.flat_keys()):
+            raise ValueError(f"unknown field(s) {', '.join(unknown_fields)}; see the keys of /api/results_flat")
+
+        return cls(divisions=tuple(d.upper() for d in as_list('division')), start_date=start_date, end_date=end_date,
+                   tourney_names=as_list('tourney'), country_codes=tuple(c.upper() for c in as_list('country')),
+                   winner_country_codes=tuple(c.upper() for c in as_list('winner_country')),
+                   winner_ids=tuple(int(w) for w in as_list('winner')), designations=as_list('designation'),
+                   fields=fields, after=after, limit=limit)
+
+    @property
+    def include_results(self) -> bool:
+        """The JSONB leaderboard is the bulk of the payload, so it's only selected when the projection asks for it"""
+        return not self.fields or 'event_results' in self.fields
+
+    def apply(self, query):
+        """Adds this instance's where clauses, ordering & limit to a select over Player, Event, Tournament & Country"""
+        if self.divisions:
+            query = query.filter(Player.division.in_(self.divisions))
+        if self.start_date:
+            query = query.filter(Event.end_date >= self.start_date)
+        if self.end_date:
+            query = query.filter(Event.end_date <= self.end_date)
+        if self.tourney_names:
+            query = query.filter(Tournament.name.in_(self.tourney_names))
+        if self.country_codes:
+            query = query.filter(Event.country_code.in_(self.country_codes))
+        if self.winner_country_codes:
+            query = query.filter(Player.country_code.in_(self.winner_country_codes))
+        if self.winner_ids:
+            query = query.filter(Event.winner_id.in_(self.winner_ids))
+        if self.designations:
+            query = query.filter(Event.designation.in_(self.designations))
+        if self.after:
+            query = query.filter(tuple_(Event.end_date, Event.id) < tuple_(*self.after))
+        query = query.order_by(Event.end_date.desc(), Event.id.desc())
+        if self.limit:
+            query = query.limit(self.limit + 1)  # the extra row tells us whether there is a next page
+        return query
 
 
 @dataclass
 class EventResults:
+    filters: ResultFilters = field(default_factory=ResultFilters)
     results: list[dict[str: dict]] = field(init=False)
+    next_cursor: str | None = field(init=False, default=None)
 
     def __post_init__(self):
-        self.results = self._get_all_event_result_data()
+        self.results = self._get_all_event_result_data(self.filters)
+        if self.filters.limit and len(self.results) > self.filters.limit:
+            self.results = self.results[:self.filters.limit]
+            last_event = self.results[-1]['event']
+            self.next_cursor = f"{last_event['end_date'].isoformat()}_{last_event['id']}"
 
     @staticmethod
-    def _get_all_event_result_data() -> list[dict[str: dict]]:
-        """ Returns a list of nested dictionaries
-        {'event': {'end_date': ...}, 'player': {'full_name': ...}}"""
-        with get_db_session() as s:
-            results = (s.query(Player, Event, Tournament, Country).
-                       join(Player, Event.winner_id == Player.pdga_id).
-                       join(Tournament, Event.tourney_id == Tournament.id).
-                       join(Country, Player.country_code == Country.code)).all()
-            return [{'event': event.k_v, 'player': player.k_v, 'country': country.k_v, 'tourney': tourney.k_v}
-                    for player, event, tourney, country in results]
+    def _tables(include_results: bool = True) -> dict[str, list[Column]]:
+        """The columns selected per nested dict (& results_flat key prefix)"""
+        return {'event': [c for c in Event.__table__.c if include_results or c.key != 'results'],
+                'player': Player.read_columns(), 'country': list(Country.__table__.c),
+                'tourney': list(Tournament.__table__.c)}
+
+    @classmethod
+    def flat_keys(cls) -> frozenset[str]:
+        """Every key of a results_flat row, i.e. what fields= may project"""
+        derived_keys = ('event_year', 'event_tourney_name', 'event_country_name', 'player_full_name')
+        return frozenset([f'{table}_{c.key}' for table, columns in cls._tables().items() for c in columns] +
+                         list(derived_keys))
+
+    @staticmethod
+    def _get_all_event_result_data(filters: ResultFilters = ResultFilters()) -> list[dict[str: dict]]:
+        """ Returns a list of nested dictionaries, newest event first
+        {'event': {'end_date': ...}, 'player': {'full_name': ...}}
+        It's a read-only Core select: each row's columns are labelled 'table.column' & split into the nested dicts,
+        the same shape as the models' k_v, w/o building any ORM instances."""
+        event_country = Country.__table__.alias('event_country')
+        tables = EventResults._tables(filters.include_results)
+        columns = [c.label(f'{table}.{c.key}') for table, table_columns in tables.items() for c in table_columns]
+        columns += [Tournament.name.label('event.tourney_name'), event_country.c.name.label('event.country_name')]
+        query = (select(*columns).
+                 join_from(Event, Player, Event.winner_id == Player.pdga_id).
+                 join(Tournament, Event.tourney_id == Tournament.id).
+                 join(Country, Player.country_code == Country.code).
+                 outerjoin(event_country, Event.country_code == event_country.c.code))
+        table_keys = [c.name.partition('.')[::2] for c in columns]
+
+        results = []
+        with get_read_connection() as conn:
+            for row in conn.execute(filters.apply(query)):  # plain tuples, in the order of columns
+                nested = {table: {} for table in tables}
+                for (table, key), value in zip(table_keys, row):
+                    nested[table][key] = value
+                results.append({'event': Event.row_k_v(nested['event']), 'player': Player.row_k_v(nested['player']),
+                                'country': nested['country'], 'tourney': nested['tourney']})
+        return results
 
     @property
     def results_flat(self) -> list[dict]:
         """ Returns a single flattened dictionary for each event result.
-        Because tables may have the same column names, fully qualify the keys as table_{db_col}"""
+        Because tables may have the same column names, fully qualify the keys as table_{db_col}.
+        If the filters specify fields, only those keys are returned."""
         flattened = []
         for event in self.results:
             new_event = {}
             for parent_key, data in event.items():
                 for k, v in data.items():
                     new_event[f'{parent_key}_{k}'] = v
+            if self.filters.fields:
+                new_event = {k: new_event[k] for k in self.filters.fields if k in new_event}
             flattened.append(new_event)
         return flattened
 
@@ -56,15 +188,53 @@ class EventResults:
         return sorted([e for e in self.results_flat], key=lambda x: x['event_end_date'], reverse=True)[0]
 
 
+@dataclass(frozen=True)
+class ResultsSnapshot:
+    """The joined event results, materialized once per data version.
+    It is shared by every request thread in the process, so treat its lists & dicts as read-only."""
+    version: DataVersion
+    results: list[dict[str: dict]]
+    results_flat: list[dict]
+    _encoded: dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    def encoded(self, attribute: str, encode: Callable[[Any], bytes]) -> bytes:
+        """The attribute (e.g. 'results_flat') serialized by encode, cached for the life of the snapshot, so hot
+        responses skip serialization.  Threads racing on a cold cache may each encode it; they get the same bytes."""
+        if (data := self._encoded.get(attribute)) is None:
+            data = self._encoded[attribute] = encode(getattr(self, attribute))
+        return data
+
+
+_snapshot: ResultsSnapshot | None = None
+_snapshot_lock = Lock()
+
+def get_results_snapshot(version: DataVersion = None) -> ResultsSnapshot:
+    """Returns the process-wide results snapshot, rebuilding it only if the data version has changed.
+    The lock ensures concurrent requests for a stale snapshot trigger a single rebuild."""
+    global _snapshot
+    version = version or get_data_version()
+    snapshot = _snapshot
+    if snapshot and snapshot.version == version:
+        return snapshot
+    with _snapshot_lock:
+        if not _snapshot or _snapshot.version != version:
+            event_results = EventResults()
+            _snapshot = ResultsSnapshot(version, event_results.results, event_results.results_flat)
+        return _snapshot
+
+
 def get_all_events() -> list[dict]:
-    with get_db_session() as s:
-        events = s.query(Event).all()
-        return [e.k_v for e in events]
+    event_country = Country.__table__.alias('event_country')
+    query = (select(Event.__table__, Tournament.name.label('tourney_name'),
+                    event_country.c.name.label('country_name')).
+             join_from(Event, Tournament, Event.tourney_id == Tournament.id).
+             outerjoin(event_country, Event.country_code == event_country.c.code))
+    return [Event.row_k_v(row) for row in read_mappings(query)]
 
 def get_last_added_event() -> tuple[str, date]:
     """Used to support dg_admin, which only needs to see the last event"""
     with get_db_session() as s:
-        e = s.query(Event).order_by(desc(Event.created_ts)).first()
+        e = s.query(Event).options(joinedload(Event.tourney)).order_by(desc(Event.created_ts)).first()
         tourney_name = e.tourney.name
         tourney_end_date = e.end_date
         return tourney_name, tourney_end_date
@@ -77,45 +247,268 @@ def update_dg_event(pdga_event_obj: PDGAEvent, division: str):
     div_results = pdga_event_obj.data['division_results'][division]
 
     with get_cursor_w_commit() as c:
-        query = ("update dg_event set results = %s from dg_player p "
-                 "where dg_event.pdga_event_id = %s and p.division = %s and dg_event.winner_id = p.pdga_id;")
+        query = ("update dg_event set results = %s, lmt = now() from dg_player p "
+                 "where dg_event.pdga_event_id = %s and p.division = %s and dg_event.winner_id = p.pdga_id "
+                 "returning dg_event.id;")
         c.execute(query, (json.dumps(div_results), pdga_event_obj.pdga_event_id, division))
+        cols = ['event_id', *RESULT_KEY_COL_MAP.values()]
+        insert_query = (f"insert into dg_result ({', '.join(cols)}) "
+                        f"values ({', '.join(f'%({col})s' for col in cols)});")
+        for (event_id, ) in c.fetchall():
+            c.execute("delete from dg_result where event_id = %s;", (event_id, ))
+            c.executemany(insert_query, result_rows(event_id, div_results))
+    invalidate_data_version()
+    refresh_player_year_aggregates([pdga_event_obj.end_date.year])
 
-def write_event_to_db(pdga_event_id: int, designation: str, tourney_id: int, div: str) -> None:
-    pe = PDGAEvent(pdga_event_id)
-    governing_body = 'PDGA' if designation == 'Major' else 'DGPT'
-    winner_id = pe.get_winner_by_division(div)
-    all_players = get_all_players()
+@dataclass
+class EventReferences:
+    """The reference data needed to validate a batch of new events, loaded with one query per table"""
+    player_divisions: dict[int, str]
+    tourney_ids: set[int]
+    loaded_event_keys: set[tuple[int, date, str]]  # (tourney_id, end_date, division), as uq_dg_event_tourney_end_div
+    governing_bodies: set[str]
 
-    if winner_id not in {p['pdga_id'] for p in get_all_players()}:
-        raise ValueError(f"Player w PDGA# {winner_id} doesn't exist yet. Please create the player and re-run.")
+    @classmethod
+    def load(cls) -> 'EventReferences':
+        with get_db_session() as s:
+            player_divisions = dict(s.execute(select(Player.pdga_id, Player.division)).all())
+            tourney_ids = set(s.scalars(select(Tournament.id)))
+            loaded_event_keys = set(map(tuple, s.execute(select(Event.tourney_id, Event.end_date, Event.division))))
+            governing_bodies = set(s.scalars(select(Event.governing_body).distinct()))
+        return cls(player_divisions, tourney_ids, loaded_event_keys, governing_bodies)
 
-    winner_div = next((p['division'] for p in all_players if p['pdga_id'] == winner_id), None)
+    def player_division(self, pdga_id: int) -> str | None:
+        """None if there's no such player, '' if the player has no division"""
+        if pdga_id not in self.player_divisions:
+            return None
+        return self.player_divisions[pdga_id] or ''
 
-    if not winner_div:
-        raise ValueError(f"No event results found for PDGA Event# {pdga_event_id}")
+    def tourney_exists(self, tourney_id: int) -> bool:
+        return tourney_id in self.tourney_ids
+
+    def event_exists(self, tourney_id: int, end_date: date, division: str) -> bool:
+        return (tourney_id, end_date, division) in self.loaded_event_keys
+
+    def governing_body_exists(self, governing_body: str) -> bool:
+        return governing_body in self.governing_bodies
+
+
+class IndexedEventReferences:
+    """The same checks as EventReferences, answered by primary key / unique index lookups for a single event,
+    so their cost doesn't grow with the size of dg_player, dg_tourney or dg_event"""
+    def __init__(self, session: Session, new_player_divisions: dict[int, str] = None):
+        self.s = session
+        self.new_player_divisions = new_player_divisions or {}  # players that will be inserted along w the event
+
+    def player_division(self, pdga_id: int) -> str | None:
+        """None if there's no such player, '' if the player has no division"""
+        if pdga_id in self.new_player_divisions:
+            return self.new_player_divisions[pdga_id]
+        row = self.s.execute(select(Player.division).where(Player.pdga_id == pdga_id)).one_or_none()
+        return None if row is None else row.division or ''
+
+    def tourney_exists(self, tourney_id: int) -> bool:
+        return self.s.scalar(select(exists().where(Tournament.id == tourney_id)))
+
+    def event_exists(self, tourney_id: int, end_date: date, division: str) -> bool:
+        return self.s.scalar(select(exists().where(Event.tourney_id == tourney_id, Event.end_date == end_date,
+                                                   Event.division == division)))
+
+    def governing_body_exists(self, governing_body: str) -> bool:
+        return self.s.scalar(select(exists().where(Event.governing_body == governing_body)))
+
+
+def _governing_body(designation: str) -> str:
+    return 'PDGA' if designation == 'Major' else 'DGPT'
+
+def _check_event(pe: PDGAEvent, designation: str, tourney_id: int, div: str,
+                 refs: EventReferences | IndexedEventReferences) -> None:
+    """The checks that don't need the winner in dg_player (finalized, tourney, duplicate, governing body), so they can
+    run before any missing players are resolved.  Raises a ValueError explaining why the event can't load."""
+    governing_body = _governing_body(designation)
+    # the event's division is its winner's; a winner who isn't in dg_player yet will be added in this division
+    division = refs.player_division(pe.get_winner_by_division(div)) or div
 
     if pe.status != pe.PDGA_COMPLETED_EVENT_STATUS:
         raise ValueError(f"Event results for the {pe.end_date} event aren't finalized on the PDGA site.")
 
-    if tourney_id not in {t['id'] for t in get_all_tourneys()}:
+    if not refs.tourney_exists(tourney_id):
         raise ValueError(f"Can't find tourney ID {tourney_id} in db. Please create the tournament & re-run.")
 
-    for e in get_all_events():
-        loaded_event_winner_div = next(p['division'] for p in all_players if p['pdga_id'] == e['winner_id'])
-        if e['tourney_id'] == tourney_id and e['end_date'] == pe.end_date and winner_div == loaded_event_winner_div:
-            raise ValueError(f"Tournament ID {tourney_id} for {div} ending on {pe.end_date} already exists.")
+    if refs.event_exists(tourney_id, pe.end_date, division):
+        raise ValueError(f"Tournament ID {tourney_id} for {div} ending on {pe.end_date} already exists.")
 
-    if governing_body not in {e['governing_body'] for e in get_all_events()}:
+    if not refs.governing_body_exists(governing_body):
         raise ValueError(f"{governing_body} is not a legitimate governing body")
 
+def _validated_event(pe: PDGAEvent, designation: str, tourney_id: int, div: str,
+                     refs: EventReferences | IndexedEventReferences) -> Event:
+    """Returns a new (unsaved) Event from the scraped event, else raises a ValueError explaining why it can't load"""
+    _check_event(pe, designation, tourney_id, div, refs)
+    winner_id = pe.get_winner_by_division(div)
+    winner_div = refs.player_division(winner_id)
+
+    if winner_div is None:
+        raise ValueError(f"Player w PDGA# {winner_id} doesn't exist yet. Please create the player and re-run.")
+
+    if not winner_div:
+        raise ValueError(f"No event results found for PDGA Event# {pe.pdga_event_id}")
+
+    return Event(governing_body=_governing_body(designation), designation=designation,
+                 start_date=pe.begin_date, end_date=pe.end_date,
+                 city=pe.city, state=pe.state_code, country_code=pe.country_code,
+                 pdga_event_id=pe.pdga_event_id, winner_id=winner_id, tourney_id=tourney_id, division=winner_div,
+                 results=pe.data['division_results'][div])
+
+def _save_events(events: list[Event], new_players: list[dict] = ()) -> None:
+    """Inserts the new players (see find_missing_players), the events & their dg_result rows in one transaction,
+    then refreshes the aggregates for the events' years"""
+    years = {e.end_date.year for e in events}  # read before the commit expires the instances
+    try:
+        with get_db_session() as s:
+            insert_players(s, list(new_players))
+            s.add_all(events)
+            s.flush()  # assigns event.id
+            for event in events:
+                replace_event_results(s, event.id, event.results)
+            s.commit()
+    except IntegrityError as e:
+        # uq_dg_event_tourney_end_div catches a duplicate that was loaded after validation
+        raise ValueError(f"One of these events already exists: {e.orig}") from e
+    invalidate_data_version()
+    refresh_player_year_aggregates(years)
+
+
+@dataclass
+class MissingPlayers:
+    """Leaderboard finishers who aren't in dg_player yet, resolved from pdga.com but not written.
+    _save_events inserts them in the same transaction as their events, so a load that fails adds no one."""
+    rows: list[dict] = field(default_factory=list)  # dg_player rows
+    failed: list[PlayerImportRow] = field(default_factory=list)
+
+    @property
+    def divisions(self) -> dict[int, str]:
+        return {row['pdga_id']: row['division'] for row in self.rows}
+
+    def rows_for(self, leaderboards: list[list[dict]]) -> list[dict]:
+        """The rows of the players who finished on these leaderboards"""
+        pdga_ids = {result.get('PDGA#') for div_results in leaderboards for result in div_results}
+        return [row for row in self.rows if row['pdga_id'] in pdga_ids]
+
+    def warnings_for(self, div_results: list[dict]) -> list[str]:
+        pdga_ids = {result.get('PDGA#') for result in div_results}
+        return [f"Couldn't add player {row.label}: {row.error}" for row in self.failed if row.pdga_id in pdga_ids]
+
+def find_missing_players(leaderboards: list[tuple[str, list[dict]]],
+                         known_ids: set[int] | None = None) -> MissingPlayers:
+    """Resolves the finishers on these (division, results) leaderboards who aren't in dg_player yet: names & PDGA#s
+    come from the leaderboard, countries from their pdga.com profiles (fetched concurrently).
+    Pass known_ids to skip the query for existing players."""
+    rows: dict[int, PlayerImportRow] = {}
+    for div, div_results in leaderboards:
+        for result in div_results:
+            pdga_id = result.get('PDGA#')
+            if pdga_id and pdga_id not in rows:
+                first_name, _, last_name = (result.get('Name') or '').partition(' ')
+                rows[pdga_id] = PlayerImportRow(first_name or None, last_name or None, pdga_id, Division(div))
+    if known_ids is None:
+        with get_db_session() as s:
+            known_ids = set(s.scalars(select(Player.pdga_id).where(Player.pdga_id.in_(rows))))
+    missing = [row for pdga_id, row in rows.items() if pdga_id not in known_ids]
+    if not missing:
+        return MissingPlayers()
+    return MissingPlayers(*resolve_players(missing))
+
+def write_event_to_db(pdga_event_id: int, designation: str, tourney_id: int, div: str,
+                      add_players: bool = False) -> list[str]:
+    """With add_players, the event's finishers missing from dg_player are inserted along w the event (see
+    find_missing_players); the winner may be one of them.  They're only looked up on pdga.com once the event has
+    passed the checks that don't need them.  Returns warnings about players that couldn't be added."""
+    pe = PDGAEvent(pdga_event_id, divisions=(div, ), stream=True)
+    div_results = pe.data['division_results'].get(div, [])
+    missing = MissingPlayers()
+    if add_players:
+        with get_db_session() as s:
+            _check_event(pe, designation, tourney_id, div, IndexedEventReferences(s))
+        missing = find_missing_players([(div, div_results)])
     with get_db_session() as s:
-        s.add(Event(governing_body=governing_body, designation=designation,
-                    start_date=pe.begin_date, end_date=pe.end_date,
-                    city=pe.city, state=pe.state_code, country_code=pe.country_code,
-                    pdga_event_id=pdga_event_id, winner_id=winner_id, tourney_id=tourney_id,
-                    results=pe.data['division_results'][div]))
-        s.commit()
+        refs = IndexedEventReferences(s, new_player_divisions=missing.divisions)
+        event = _validated_event(pe, designation, tourney_id, div, refs)
+    _save_events([event], missing.rows)
+    return missing.warnings_for(div_results)
+
+
+@dataclass
+class EventLoadResult:
+    pdga_event_id: int
+    div: str
+    error: str | None = None
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def load_events(cues: list[dict], max_workers: int = PDGA_MAX_CONCURRENCY,
+                add_players: bool = False) -> list[EventLoadResult]:
+    """Batch version of write_event_to_db for cues like get_completed_unloaded_events() returns.
+    Each distinct PDGA event is streamed once (in parallel), keeping only its cues' divisions, the reference data is
+    loaded once, every cue is validated in memory, and all the valid events are inserted in a single transaction.
+    Returns a result per cue, in order.
+    With add_players, the finishers missing from dg_player on the leaderboards of the events that pass _check_event
+    are resolved & inserted in that same transaction."""
+    event_divisions: dict[int, tuple[str, ...]] = {}
+    for cue in cues:
+        event_divisions[cue['pdga_event_id']] = (*event_divisions.get(cue['pdga_event_id'], ()), cue['div'])
+    scraped: dict[int, PDGAEvent | Exception] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(PDGAEvent, pdga_event_id, divisions, stream=True): pdga_event_id
+                   for pdga_event_id, divisions in event_divisions.items()}
+        for future in as_completed(futures):
+            try:
+                scraped[futures[future]] = future.result()
+            except Exception as e:
+                scraped[futures[future]] = e
+
+    refs = EventReferences.load()
+    missing = MissingPlayers()
+    if add_players:
+        def passes_checks(cue: dict, pe: PDGAEvent) -> bool:
+            try:
+                _check_event(pe, cue['designation'], cue['tourney_id'], cue['div'], refs)
+            except (ValueError, KeyError, IndexError):
+                return False  # reported below
+            return True
+        leaderboards = [(cue['div'], pe.data['division_results'].get(cue['div'], [])) for cue in cues
+                        if not isinstance(pe := scraped[cue['pdga_event_id']], Exception) and passes_checks(cue, pe)]
+        missing = find_missing_players(leaderboards, set(refs.player_divisions))
+        refs.player_divisions.update(missing.divisions)
+
+    results, events = [], []
+    for cue in cues:
+        result = EventLoadResult(cue['pdga_event_id'], cue['div'])
+        results.append(result)
+        pe = scraped[cue['pdga_event_id']]
+        if isinstance(pe, Exception):
+            result.error = f"Couldn't scrape PDGA Event # {cue['pdga_event_id']}: {pe}"
+            continue
+        try:
+            event = _validated_event(pe, cue['designation'], cue['tourney_id'], cue['div'], refs)
+        except (ValueError, KeyError, IndexError) as e:
+            result.error = str(e)
+            continue
+        refs.loaded_event_keys.add((event.tourney_id, event.end_date, event.division))
+        result.warnings = missing.warnings_for(event.results or [])
+        events.append(event)
+
+    if events:
+        try:
+            _save_events(events, missing.rows_for([event.results or [] for event in events]))
+        except Exception as e:
+            for result in results:
+                if result.ok:
+                    result.error = f"Not saved; the batch insert failed: {e}"
+    return results
 
 def get_completed_unloaded_events() -> list[dict | None]:
     """Query dg_season & dg_event to find unloaded events. Returns a list of dicts with data needed for write_to_db()"""
@@ -129,3 +522,4 @@ def get_completed_unloaded_events() -> list[dict | None]:
             events_to_write.append({'pdga_event_id': se['pdga_event_id'], 'designation': se['event_designation'],
                                     'tourney_id': se['tourney_id'], 'div': div})
     return events_to_write
+
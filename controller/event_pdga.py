@@ -1,24 +1,44 @@
 from datetime import date, datetime
+from functools import cached_property
+from html.parser import HTMLParser
 import json
-import requests
+from typing import Iterator
 
-from bs4 import BeautifulSoup
-from controller.country import get_countries
-from states import states
+from bs4 import BeautifulSoup, SoupStrainer
+from controller.country import country_code_from_name, state_code_from_name
+from controller.pdga_client import get_pdga_client
 from utilnacki.soup import list_of_dicts_from_soup_table
 
 
-EVENT_BASE_URL = 'https://www.pdga.com/tour/event/'
+EVENT_PATH = '/tour/event/'
+RESULT_DIVISIONS = ('MPO', 'FPO')  # the only divisions this app keeps
+STATUS_CELL_CLASSES = ('status', 'players', 'purse')
+
+try:
+    import lxml  # optional: BeautifulSoup's lxml builder is faster than the pure-Python html.parser
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
 
 
 class PDGAEvent:
     PDGA_COMPLETED_EVENT_STATUS = 'Event complete; official ratings processed.'
     EVENT_IDS_W_NO_PDGA_EVENT_ID = {6, 80, 159, 233}
 
-    def __init__(self, pdga_event_id: int):
+    def __init__(self, pdga_event_id: int, divisions: tuple[str, ...] | None = RESULT_DIVISIONS,
+                 parser: str = DEFAULT_HTML_PARSER, stream: bool = False):
+        """divisions limits which division tables are parsed; None parses every division on the page.
+        stream builds the (already clean) division results from EventPageStream while the page downloads,
+        instead of holding the whole page, its tree & every raw table in memory; only the divisions' rows are kept."""
         self.pdga_event_id = pdga_event_id
-        self._scraped_data: dict = self._scrape_event_page()
-        self.data: dict = self._clean_division_result_data()
+        self.divisions = divisions
+        self.parser = parser
+        if stream:
+            self._scraped_data: dict = self._stream_event_page()
+            self.data: dict = self._scraped_data
+        else:
+            self._scraped_data: dict = self._scrape_event_page()
+            self.data: dict = self._clean_division_result_data()
 
     @property
     def data_as_json(self):
@@ -39,15 +59,15 @@ class PDGAEvent:
     def status(self) -> str:
         return self.data['status']
 
-    @property
+    @cached_property
     def location(self) -> tuple[str, str, str]:
-        """Returns city, state code | '', country code"""
+        """Returns city, state code | '', country code.  Parsed once per instance, from cached name->code indexes."""
         location = self.data['location']
         string = location[location.index(': ') + 2:]
         city, *state_full, country_full = string.split(', ')
-        country_code = next((code for code, data in get_countries().items() if data['name'] == country_full), None)
+        country_code = country_code_from_name(country_full)
         state_full = state_full[0] if state_full else None
-        state_code = next((code for code, name in states.items() if name == state_full), '')
+        state_code = state_code_from_name(state_full)
         if not country_code:
             raise ValueError(f"Country not found from country name: {country_full}")
         return city, state_code, country_code
@@ -72,39 +92,15 @@ class PDGAEvent:
         return self.data['division_results'][division.upper()][0]['PDGA#']
 
     def _scrape_event_page(self) -> dict:
-        response = requests.get(f'{EVENT_BASE_URL}{self.pdga_event_id}')
-
-        if response.status_code != 200:
-            raise requests.exceptions.HTTPError(f"Failed to fetch from URL f'{EVENT_BASE_URL}{self.pdga_event_id}'. "
-                                                f"Status code: {response.status_code}")
-
-        # Parse the HTML content with BeautifulSoup
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        divisions: list[str] = [div_tag['id'] for div_tag in soup.find_all(class_="division")]
-
-        # Find all tables on the page
-        tables = soup.find_all("table")
-
-        # the first table is the event status
-        event_status_html = tables[0]
-        event_status_data_row = event_status_html.find_all("tr")[1]
-
-        event_data = {'pdga_event_id': self.pdga_event_id,
-                      'status': event_status_data_row.find(class_="status").text,
-                      'player_cnt': event_status_data_row.find(class_="players").text,
-                      'purse': event_status_data_row.find(class_="purse").text,
-                      'dates': soup.find(class_="tournament-date").text,
-                      'location': soup.find(class_='tournament-location').text,
-                      'name': soup.find("h1").text,
-                      'division_results': {}}
-
-        # Iterate over the division results table
-        for idx, table in enumerate(tables[1:]):  # the event status table is handled above
-            division = divisions[idx]
-            event_data['division_results'][division] = list_of_dicts_from_soup_table(table)
+        html = get_pdga_client().get_text(f'{EVENT_PATH}{self.pdga_event_id}')
+        return parse_event_page(html, self.pdga_event_id, self.divisions, self.parser)
 
-        return event_data
+    def _stream_event_page(self) -> dict:
+        page = EventPageStream(self.pdga_event_id, self.divisions)
+        division_results = {}
+        for division, row in page:
+            division_results.setdefault(division, []).append(row)
+        return {**page.event_data, 'division_results': division_results}
 
     def _clean_division_result_data(self) -> dict[str: list[dict]]:
         """Cleans data from [{'Name': 'Drew Gibson', 'PDGA#': '48346', 'Par': 'E', '': ''} ...] to:
@@ -112,27 +108,186 @@ class PDGAEvent:
         for div, table_data in self._scraped_data['division_results'].items():
             if div not in ('MPO', 'FPO'):
                 continue
-            div_results_clean = []
-            for d_dirty in table_data:
-                d_clean = {}
-                for k, v in d_dirty.items():
-                    if k == '':  # ignoring round rating cols whose keys are ''
-                        continue
-                    if k == 'Par' and v == 'E':
-                        value = 0
-                    elif k in ('Place', 'PDGA#', 'Rating', 'Par', 'Rd1', 'Rd2', 'Rd3', 'Rd4', 'Finals', 'Total'):
-                        try:
-                            value = int(v)
-                        except ValueError:
-                            value = None  # handle DNFs
-                    elif k == 'Points':
-                        value = float(v) if v else 0
-                    elif k == 'Prize':
-                        value = float(v.replace("$", "").replace(",", "")) if v else 0
-                    else:
-                        value = v
-                    d_clean[k] = value
-                div_results_clean.append(d_clean)
+            div_results_clean = [clean_result_row(d_dirty) for d_dirty in table_data]
             self._scraped_data['division_results'][div] = div_results_clean
 
         return self._scraped_data
+
+
+def clean_result_row(d_dirty: dict[str, str]) -> dict:
+    """Cleans a row from {'Name': 'Drew Gibson', 'PDGA#': '48346', 'Par': 'E', '': ''} to:
+    {'Name': 'Drew Gibson', 'PDGA#': 48346, 'Par': 0}"""
+    d_clean = {}
+    for k, v in d_dirty.items():
+        if k == '':  # ignoring round rating cols whose keys are ''
+            continue
+        if k == 'Par' and v == 'E':
+            value = 0
+        elif k in ('Place', 'PDGA#', 'Rating', 'Par', 'Rd1', 'Rd2', 'Rd3', 'Rd4', 'Finals', 'Total'):
+            try:
+                value = int(v)
+            except ValueError:
+                value = None  # handle DNFs
+        elif k == 'Points':
+            value = float(v) if v else 0
+        elif k == 'Prize':
+            value = float(v.replace("$", "").replace(",", "")) if v else 0
+        else:
+            value = v
+        d_clean[k] = value
+    return d_clean
+
+
+class _EventPageParser(HTMLParser):
+    """Incremental (feed as you download) parser for pdga.com event pages. It keeps the header fields & only
+    the rows of the wanted division tables, which it queues as cleaned dicts as soon as each row closes."""
+    HEADER_FIELDS = {'tournament-date': 'dates', 'tournament-location': 'location'}
+
+    def __init__(self, divisions: tuple[str, ...] | None):
+        super().__init__(convert_charrefs=True)
+        self.divisions = divisions
+        self.header: dict[str, str] = {}
+        self.rows: list[tuple[str, dict]] = []
+        self._capture: list | None = None  # [header key, tag name, nesting depth, text pieces]
+        self._division: str | None = None
+        self._headers: list[str] | None = None
+        self._cells: list[str] | None = None
+        self._cell: list[str] | None = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str]]):
+        attrs = dict(attrs)
+        classes = _class_list(attrs)
+        if self._capture:
+            self._capture[2] += tag == self._capture[1]
+        elif tag == 'h1' and 'name' not in self.header:
+            self._capture = ['name', tag, 1, []]
+        elif tag == 'td' and any(c in classes for c in STATUS_CELL_CLASSES):
+            key = next(c for c in STATUS_CELL_CLASSES if c in classes)
+            if key not in self.header:
+                self._capture = [key, tag, 1, []]
+        elif any(c in classes for c in self.HEADER_FIELDS):
+            key = next(v for c, v in self.HEADER_FIELDS.items() if c in classes)
+            if key not in self.header:
+                self._capture = [key, tag, 1, []]
+
+        if 'division' in classes:
+            wanted = self.divisions is None or attrs.get('id') in self.divisions
+            self._division = attrs.get('id') if wanted else None
+            self._headers = None
+        elif self._division and tag == 'tr':
+            self._cells = []
+        elif self._division and tag in ('td', 'th') and self._cells is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag: str):
+        if self._capture and tag == self._capture[1]:
+            self._capture[2] -= 1
+            if not self._capture[2]:
+                key, _, _, pieces = self._capture
+                self.header[key] = ''.join(pieces)
+                self._capture = None
+
+        if not self._division:
+            return
+        if tag in ('td', 'th') and self._cell is not None:
+            self._cells.append(''.join(p.strip() for p in self._cell))  # same as bs4's get_text(strip=True)
+            self._cell = None
+        elif tag == 'tr' and self._cells is not None:
+            if self._headers is None:
+                self._headers = self._cells
+            else:
+                self.rows.append((self._division, clean_result_row(dict(zip(self._headers, self._cells)))))
+            self._cells = None
+        elif tag == 'table':
+            self._division = None
+
+    def handle_data(self, data: str):
+        if self._capture:
+            self._capture[3].append(data)
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+class EventPageStream:
+    """Downloads & parses an event page incrementally: iterating yields (division, cleaned result row) tuples
+    while the page is still downloading, holding only a chunk & the current row in memory.
+    Once iterated, event_data has the same header fields as parse_event_page (without division_results).
+    divisions=None streams the rows of every division."""
+    def __init__(self, pdga_event_id: int, divisions: tuple[str, ...] | None = RESULT_DIVISIONS,
+                 chunk_size: int = 16 * 1024):
+        self.pdga_event_id = pdga_event_id
+        self.divisions = divisions
+        self.chunk_size = chunk_size
+        self.event_data: dict = {}
+
+    def __iter__(self) -> Iterator[tuple[str, dict]]:
+        parser = _EventPageParser(self.divisions)
+        for chunk in get_pdga_client().iter_text(f'{EVENT_PATH}{self.pdga_event_id}', chunk_size=self.chunk_size):
+            parser.feed(chunk)
+            yield from parser.rows
+            parser.rows.clear()
+        parser.close()
+        yield from parser.rows
+        self.event_data = {'pdga_event_id': self.pdga_event_id, **{k: parser.header.get(k) for k in
+                           ('status', 'players', 'purse', 'dates', 'location', 'name')}}
+        self.event_data['player_cnt'] = self.event_data.pop('players')
+
+
+def _class_list(attrs) -> list[str]:
+    classes = attrs.get('class') or []
+    return classes.split() if isinstance(classes, str) else classes
+
+def _event_page_strainer(divisions: tuple[str, ...]) -> SoupStrainer:
+    """Only builds tags for the header fields, the status cells & the wanted division blocks"""
+    def wanted(name: str, attrs) -> bool:
+        classes = _class_list(attrs)
+        if 'division' in classes:
+            return attrs.get('id') in divisions
+        return (name == 'h1' or 'tournament-date' in classes or 'tournament-location' in classes
+                or (name == 'td' and any(c in classes for c in STATUS_CELL_CLASSES)))
+    return SoupStrainer(wanted)
+
+def parse_event_page(html: str, pdga_event_id: int, divisions: tuple[str, ...] | None = RESULT_DIVISIONS,
+                     parser: str = DEFAULT_HTML_PARSER) -> dict:
+    """Parses a pdga.com event page into the event status & the raw division result tables.
+    With divisions, only those division blocks (plus the status block) are built into the tree,
+    which skips most of a big event's page. Falls back to a full parse if the page doesn't nest tables in divisions."""
+    if divisions is not None:
+        soup = BeautifulSoup(html, parser, parse_only=_event_page_strainer(divisions))
+        division_tags = soup.find_all(class_="division")
+        if all(div_tag.find("table") for div_tag in division_tags):
+            event_data = _event_header_data(soup, pdga_event_id, status_row=soup)
+            for div_tag in division_tags:
+                event_data['division_results'][div_tag['id']] = list_of_dicts_from_soup_table(div_tag.find("table"))
+            return event_data
+
+    # Parse the HTML content with BeautifulSoup
+    soup = BeautifulSoup(html, parser)
+
+    division_names: list[str] = [div_tag['id'] for div_tag in soup.find_all(class_="division")]
+
+    # Find all tables on the page
+    tables = soup.find_all("table")
+
+    # the first table is the event status
+    event_status_html = tables[0]
+    event_status_data_row = event_status_html.find_all("tr")[1]
+    event_data = _event_header_data(soup, pdga_event_id, status_row=event_status_data_row)
+
+    # Iterate over the division results table
+    for idx, table in enumerate(tables[1:]):  # the event status table is handled above
+        division = division_names[idx]
+        if divisions is None or division in divisions:
+            event_data['division_results'][division] = list_of_dicts_from_soup_table(table)
+
+    return event_data
+
+def _event_header_data(soup: BeautifulSoup, pdga_event_id: int, status_row) -> dict:
+    return {'pdga_event_id': pdga_event_id,
+            'status': status_row.find(class_="status").text,
+            'player_cnt': status_row.find(class_="players").text,
+            'purse': status_row.find(class_="purse").text,
+            'dates': soup.find(class_="tournament-date").text,
+            'location': soup.find(class_='tournament-location').text,
+            'name': soup.find("h1").text,
+            'division_results': {}}
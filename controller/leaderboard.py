@@ -0,0 +1,121 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable
+
+from db import get_db_session
+from models import Event, Player, PlayerYearPlace, PlayerYearStats, Result
+from sqlalchemy import delete, extract, false, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+MAX_TOP_X_PLACE = 20  # the dashboard's "Top X Finishes" input goes up to 20
+AGGREGATES_LOCK_NAMESPACE = 5005  # the first key of the refresh's pg_advisory_xact_lock(namespace, year) locks
+
+
+def _lock_years(s: Session, years: Iterable[int]) -> None:
+    """Takes a transaction-scoped advisory lock per year, in order, so concurrent refreshes of the same years run
+    one after the other instead of interleaving their deletes & inserts.  Postgres only; SQLite serializes writers."""
+    if s.bind.dialect.name == 'postgresql':
+        for year in sorted(years):
+            s.execute(select(func.pg_advisory_xact_lock(AGGREGATES_LOCK_NAMESPACE, year)))
+
+
+def refresh_player_year_aggregates(years: Iterable[int] = None) -> None:
+    """Rebuilds the per player-year-division roll-ups for the given event years (default: every year), in one
+    transaction that holds a lock per year.  The event's division is its winner's division, same as the rest of the app.
+    The tables are created w the others, e.g. by migrate.py."""
+    year_col = extract('year', Event.end_date)
+
+    wins_query = (select(Event.winner_id, year_col, Player.division, func.count()).
+                  join(Player, Event.winner_id == Player.pdga_id).
+                  group_by(Event.winner_id, year_col, Player.division))
+    finishes_query = (select(Result.pdga_id, year_col, Player.division, func.count(), func.sum(Result.place)).
+                      join(Event, Result.event_id == Event.id).join(Player, Event.winner_id == Player.pdga_id).
+                      where(Result.pdga_id.is_not(None), Result.place.is_not(None)).
+                      group_by(Result.pdga_id, year_col, Player.division))
+    places_query = (select(Result.pdga_id, year_col, Player.division, Result.place, func.count()).
+                    join(Event, Result.event_id == Event.id).join(Player, Event.winner_id == Player.pdga_id).
+                    where(Result.pdga_id.is_not(None), Result.place <= MAX_TOP_X_PLACE).
+                    group_by(Result.pdga_id, year_col, Player.division, Result.place))
+
+    with get_db_session() as s:
+        if years is None:  # every year w events or w roll-ups to clear
+            years = ({int(year) for year in s.scalars(select(year_col).distinct())} |
+                     set(s.scalars(select(PlayerYearStats.year).distinct())) |
+                     set(s.scalars(select(PlayerYearPlace.year).distinct())))
+        years = sorted(set(years))
+        _lock_years(s, years)
+        # a date range per year, rather than year_col.in_(years), so the filter can use ix_dg_event_end_date
+        in_years = or_(false(), *(Event.end_date.between(date(year, 1, 1), date(year, 12, 31)) for year in years))
+
+        stats = defaultdict(lambda: {'wins': 0, 'place_cnt': 0, 'place_sum': 0})
+        for pdga_id, year, division, wins in s.execute(wins_query.where(in_years)):
+            stats[(pdga_id, int(year), division)]['wins'] = wins
+        for pdga_id, year, division, place_cnt, place_sum in s.execute(finishes_query.where(in_years)):
+            stats[(pdga_id, int(year), division)].update(place_cnt=place_cnt, place_sum=place_sum)
+
+        s.execute(delete(PlayerYearStats).where(PlayerYearStats.year.in_(years)))
+        s.execute(delete(PlayerYearPlace).where(PlayerYearPlace.year.in_(years)))
+        if stats:
+            s.execute(insert(PlayerYearStats), [{'pdga_id': pdga_id, 'year': year, 'division': division, **counts}
+                                                for (pdga_id, year, division), counts in stats.items()])
+        s.execute(insert(PlayerYearPlace).from_select(['pdga_id', 'year', 'division', 'place', 'finish_cnt'],
+                                                      places_query.where(in_years)))
+
+
+def aggregate_years(filters: dict, today: date = None) -> tuple[int, int] | None:
+    """If the dashboard filters can be answered from the player-year roll-ups, returns the (first, last) years to sum.
+    That's the case when only division & time period are filtered and the time period is made of whole years.
+    dg_event only has completed events, so a period ending today (e.g. This Year) still covers the whole year."""
+    today = today or date.today()
+    for key, value in filters.items():
+        if key not in ('player_division', 'time_period') and value and value != 'All':
+            return None
+    start_date, end_date = filters.get('time_period') or (date(1900, 1, 1), date(2099, 12, 31))
+    if (start_date.month, start_date.day) != (1, 1):
+        return None
+    if (end_date.month, end_date.day) != (12, 31) and end_date < today:
+        return None
+    return start_date.year, end_date.year
+
+def _filter(query, model, divisions: Iterable[str] | None, years: tuple[int, int] | None):
+    if divisions:
+        query = query.where(model.division.in_(list(divisions)))
+    if years:
+        query = query.where(model.year.between(*years))
+    return query
+
+def get_win_leaders(divisions: Iterable[str] = None, years: tuple[int, int] = None,
+                    limit: int = None) -> list[tuple[int, int]]:
+    """Returns [(pdga_id, wins), ...] ordered by the most wins"""
+    wins = func.sum(PlayerYearStats.wins)
+    query = select(PlayerYearStats.pdga_id, wins).group_by(PlayerYearStats.pdga_id).having(wins > 0)
+    query = _filter(query, PlayerYearStats, divisions, years).order_by(wins.desc()).limit(limit)
+    with get_db_session() as s:
+        return [(pdga_id, int(cnt)) for pdga_id, cnt in s.execute(query)]
+
+def get_avg_finish_leaders(divisions: Iterable[str] = None, years: tuple[int, int] = None,
+                           min_events: int = 1, limit: int = None) -> list[tuple[int, float]]:
+    """Returns [(pdga_id, avg place), ...] ordered by the lowest average place"""
+    place_cnt, place_sum = func.sum(PlayerYearStats.place_cnt), func.sum(PlayerYearStats.place_sum)
+    query = (select(PlayerYearStats.pdga_id, place_sum, place_cnt).group_by(PlayerYearStats.pdga_id).
+             having(place_cnt >= min_events))
+    query = _filter(query, PlayerYearStats, divisions, years).order_by(place_sum * 1.0 / place_cnt).limit(limit)
+    with get_db_session() as s:
+        return [(pdga_id, int(total) / int(cnt)) for pdga_id, total, cnt in s.execute(query)]
+
+def get_top_finish_leaders(max_place: int, divisions: Iterable[str] = None, years: tuple[int, int] = None,
+                           limit: int = None) -> list[tuple[int, int]]:
+    """Returns [(pdga_id, count of finishes at or better than max_place), ...] ordered by the most such finishes"""
+    if max_place > MAX_TOP_X_PLACE:
+        raise ValueError(f"Finishes are only rolled up through place {MAX_TOP_X_PLACE}")
+    finish_cnt = func.sum(PlayerYearPlace.finish_cnt)
+    query = (select(PlayerYearPlace.pdga_id, finish_cnt).where(PlayerYearPlace.place <= max_place).
+             group_by(PlayerYearPlace.pdga_id))
+    query = _filter(query, PlayerYearPlace, divisions, years).order_by(finish_cnt.desc()).limit(limit)
+    with get_db_session() as s:
+        return [(pdga_id, int(cnt)) for pdga_id, cnt in s.execute(query)]
+
+
+if __name__ == '__main__':
+    refresh_player_year_aggregates()
+    print('Player-year aggregates rebuilt')
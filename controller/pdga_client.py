@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+from hashlib import sha1
+import json
+import os
+from pathlib import Path
+from threading import BoundedSemaphore, Lock, get_ident
+import time
+from typing import Iterator
+
+from config import (PDGA_BACKOFF_FACTOR, PDGA_BASE_URL, PDGA_CACHE_DIR, PDGA_MAX_CONCURRENCY,
+                    PDGA_MIN_INTERVAL_SECONDS, PDGA_RETRIES, PDGA_TIMEOUT_SECONDS)
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = 'DiscGolfFlask (+https://disc-golf.onrender.com)'
+
+
+class PDGAClient:
+    """The one way this app talks to pdga.com: a pooled keep-alive session with timeouts, retries w backoff,
+    a cap on concurrent requests, a minimum interval between requests, and a conditional-request disk cache.
+    It is thread-safe, so scrapers may share it across a thread pool."""
+
+    def __init__(self, base_url: str = PDGA_BASE_URL, max_concurrency: int = PDGA_MAX_CONCURRENCY,
+                 min_interval_seconds: float = PDGA_MIN_INTERVAL_SECONDS,
+                 timeout_seconds: float = PDGA_TIMEOUT_SECONDS, retries: int = PDGA_RETRIES,
+                 backoff_factor: float = PDGA_BACKOFF_FACTOR, cache_dir: str | None = PDGA_CACHE_DIR):
+        self.base_url = base_url.rstrip('/')
+        self.timeout_seconds = timeout_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._slots = BoundedSemaphore(max_concurrency)
+        self._rate_lock = Lock()
+        self._next_request_at = 0.0
+
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET', ), respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get_text(self, path: str, params: dict = None) -> str:
+        """GETs a pdga.com path & returns the body text.  A cached copy is revalidated with If-None-Match/
+        If-Modified-Since, so an unchanged page costs a 304.  Raises requests.exceptions.HTTPError on a non-200."""
+        with self._get(path, params, stream=False) as (cache_file, cached, response):
+            if response.status_code == 304 and cached:
+                return cached['text']
+            self._raise_for_status(response)
+            self._write_cache(cache_file, response, response.text)
+            return response.text
+
+    def iter_text(self, path: str, params: dict = None, chunk_size: int = 16 * 1024) -> Iterator[str]:
+        """Like get_text, but yields the body in decoded chunks as it downloads, so a caller can parse it
+        incrementally.  A cached copy is revalidated & used on a 304 the same way, and a cacheable body is copied
+        into a new cache entry as it streams, which is written once it's fully iterated (not if the generator is
+        closed early).  The download holds one of the concurrency slots until it's fully iterated or closed."""
+        with self._get(path, params, stream=True) as (cache_file, cached, response):
+            if response.status_code == 304 and cached:
+                text = cached['text']
+                for start in range(0, len(text), chunk_size):
+                    yield text[start:start + chunk_size]
+                return
+            self._raise_for_status(response)
+            response.encoding = response.encoding or 'utf-8'
+            chunks = [] if cache_file and self._is_cacheable(response) else None
+            for chunk in response.iter_content(chunk_size=chunk_size, decode_unicode=True):
+                if chunks is not None:
+                    chunks.append(chunk)
+                yield chunk
+            if chunks is not None:
+                self._write_cache(cache_file, response, ''.join(chunks))
+
+    @contextmanager
+    def _get(self, path: str, params: dict | None,
+             stream: bool) -> Iterator[tuple[Path | None, dict | None, requests.Response]]:
+        """Sends the GET within a concurrency slot & yields (cache file, cached entry, response).  The slot is held,
+        & the response stays open, until the block exits, so a streamed body downloads inside the cap too."""
+        url = self.url(path)
+        cache_file = self._cache_file(url, params)
+        cached = self._read_cache(cache_file)
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        with self._slots:
+            self._wait_turn()
+            with self.session.get(url, params=params, headers=headers, timeout=self.timeout_seconds,
+                                  stream=stream) as response:
+                yield cache_file, cached, response
+
+    @staticmethod
+    def _raise_for_status(response: requests.Response) -> None:
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"Failed to fetch from URL {response.url}. "
+                                                f"Status code: {response.status_code}", response=response)
+
+    def _wait_turn(self) -> None:
+        """Spaces the start of requests at least min_interval_seconds apart, across threads"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_interval_seconds
+        if wait > 0:
+            time.sleep(wait)
+
+    def _cache_file(self, url: str, params: dict | None) -> Path | None:
+        if not self.cache_dir:
+            return None
+        key = sha1(json.dumps([url, sorted((params or {}).items())]).encode()).hexdigest()
+        return self.cache_dir / f'{key}.json'
+
+    @staticmethod
+    def _read_cache(cache_file: Path | None) -> dict | None:
+        if not cache_file or not cache_file.exists():
+            return None
+        try:
+            return json.loads(cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None  # a corrupt entry is just a miss
+
+    @staticmethod
+    def _is_cacheable(response: requests.Response) -> bool:
+        """Only responses a server can revalidate are worth keeping"""
+        return bool(response.headers.get('ETag') or response.headers.get('Last-Modified'))
+
+    @classmethod
+    def _write_cache(cls, cache_file: Path | None, response: requests.Response, text: str) -> None:
+        if not cache_file or not cls._is_cacheable(response):
+            return
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.{get_ident()}.tmp')
+        tmp_file.write_text(json.dumps({'url': response.url, 'etag': etag, 'last_modified': last_modified,
+                                        'text': text}), encoding='utf-8')
+        os.replace(tmp_file, cache_file)  # atomic, so concurrent readers never see a partial file
+
+
+_client: PDGAClient | None = None
+_client_lock = Lock()
+
+def get_pdga_client() -> PDGAClient:
+    """The process-wide client, so every scraper shares one connection pool & one rate limit"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PDGAClient()
+        return _client
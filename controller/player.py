@@ -1,18 +1,19 @@
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from enum import StrEnum
+from typing import Callable
 
-from db import get_db_session
+from config import PDGA_MAX_CONCURRENCY
+from db import get_db_session, read_mappings
 from flask import abort
 from models import Country, Player
 from .player_photos import PlayerPhotoUpdater
-from sqlalchemy import update
+from sqlalchemy import select, update
 from streamlit import balloons, error, success
 
 
 def get_all_players() -> list[dict]:
-    with get_db_session() as s:
-        results = s.query(Player).all()
-        return [e.k_v for e in results]
+    return [Player.row_k_v(row) for row in read_mappings(select(*Player.read_columns()))]
 
 def get_all_players_as_classes() -> list[Player]:
     with get_db_session() as s:
@@ -56,11 +57,29 @@ class NewPlayer:
             balloons()
 
 
-def update_player_photos():
-    """For all players in db, scrape new photos on pdga.com (else stock image) and update those photo_urls in the db"""
-    ids_and_urls: list[tuple[int, str]] = [(p['pdga_id'], p['photo_url']) for p in get_all_players()]
-    updated_records = PlayerPhotoUpdater(ids_and_urls).updated_records
+def update_player_photos(stale_after: timedelta = None, max_workers: int = PDGA_MAX_CONCURRENCY,
+                         progress: Callable[[int, int], None] = None) -> dict[int, str]:
+    """For all players in db, scrape new photos on pdga.com (else stock image) and update those photo_urls in the db.
+    With stale_after, only players not checked within that time (or who have no photo) are refreshed.
+    The pages are fetched concurrently.  Every player checked gets photo_checked_ts in one UPDATE that leaves lmt
+    alone, so a refresh w/o new photos doesn't change the data version; only the new photo_urls (a bulk UPDATE)
+    bump lmt.  Returns {pdga_id: error} for failures."""
+    cutoff = datetime.now() - stale_after if stale_after else None
+    players = read_mappings(select(Player.pdga_id, Player.photo_url, Player.photo_checked_ts))
+    ids_and_urls: list[tuple[int, str]] = [(p['pdga_id'], p['photo_url']) for p in players
+                                           if not cutoff or not p['photo_url'] or not p['photo_checked_ts']
+                                           or p['photo_checked_ts'] < cutoff]
+    updater = PlayerPhotoUpdater(ids_and_urls, max_workers=max_workers, progress=progress)
+    updated_records = updater.updated_records
     print(f"Updating these records: {updated_records}")
-    with get_db_session() as s:
-        s.execute(update(Player), updated_records)
-        s.commit()
+    if updater.errors:
+        print(f"Couldn't refresh these players: {updater.errors}")
+    checked_ids = [pdga_id for pdga_id, _ in ids_and_urls if pdga_id not in updater.errors]
+    if checked_ids:
+        with get_db_session() as s:
+            s.execute(update(Player.__table__).where(Player.pdga_id.in_(checked_ids)).
+                      values(photo_checked_ts=datetime.now(), lmt=Player.__table__.c.lmt))  # lmt = lmt: no onupdate
+            if updated_records:
+                s.execute(update(Player), updated_records)
+            s.commit()
+    return updater.errors
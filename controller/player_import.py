@@ -0,0 +1,163 @@
+from concurrent.futures import ThreadPoolExecutor
+import csv
+from dataclasses import dataclass, field
+import re
+from typing import Iterable
+
+from bs4 import BeautifulSoup
+from config import PDGA_MAX_CONCURRENCY
+from db import engine, get_db_session
+from models import Country, Player
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .country import country_code_from_name
+from .pdga_client import get_pdga_client
+from .player import Division
+from .player_photos import PLAYER_PATH
+from .player_scrape_pdga_id import scrape_id_and_country
+
+PLAYER_HEADING = re.compile(r'^(?P<first_name>\S+)\s+(?P<last_name>.+?)\s+#(?P<pdga_id>\d+)$')
+
+
+@dataclass
+class PlayerImportRow:
+    """One player to import: a name and/or a PDGA#. Whatever is missing is resolved from pdga.com."""
+    first_name: str | None = None
+    last_name: str | None = None
+    pdga_id: int | None = None
+    division: Division = Division.MPO
+    country_code: str | None = None
+    error: str | None = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.first_name or ''} {self.last_name or ''} #{self.pdga_id or '?'}".strip()
+
+
+@dataclass
+class PlayerImportResult:
+    inserted: list[int] = field(default_factory=list)
+    already_existed: list[int] = field(default_factory=list)
+    failed: list[PlayerImportRow] = field(default_factory=list)
+
+
+def rows_from_csv(path: str, division: Division = Division.MPO) -> list[PlayerImportRow]:
+    """Reads a csv with a header of any of: first_name, last_name, pdga_id, division, country_code"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return [PlayerImportRow(first_name=r.get('first_name') or None, last_name=r.get('last_name') or None,
+                                pdga_id=int(r['pdga_id']) if r.get('pdga_id') else None,
+                                division=Division(r.get('division') or division),
+                                country_code=(r.get('country_code') or '').upper() or None)
+                for r in csv.DictReader(f)]
+
+def rows_from_lines(lines: Iterable[str], division: Division = Division.MPO) -> list[PlayerImportRow]:
+    """Each non-blank line is either a PDGA# or 'First Last'"""
+    rows = []
+    for line in (line.strip() for line in lines):
+        if line.isdigit():
+            rows.append(PlayerImportRow(pdga_id=int(line), division=division))
+        elif line:
+            first_name, _, last_name = line.partition(' ')
+            rows.append(PlayerImportRow(first_name=first_name, last_name=last_name.strip(), division=division))
+    return rows
+
+
+def _scrape_player_page(pdga_id: int) -> tuple[str, str, str | None]:
+    """Returns first name, last name & country name from a pdga.com player page"""
+    soup = BeautifulSoup(get_pdga_client().get_text(PLAYER_PATH + str(pdga_id)), 'html.parser')
+    heading = soup.find('h1')
+    if not heading or not (match := PLAYER_HEADING.match(heading.get_text(strip=True))):
+        raise ValueError(f"No player page found for PDGA# {pdga_id}")
+    location = soup.find(class_='location')
+    country = location.get_text(strip=True).split(',')[-1].strip() if location else None
+    return match['first_name'], match['last_name'], country
+
+def _resolve(row: PlayerImportRow) -> PlayerImportRow:
+    """Fills in the row's missing PDGA#, name or country code from pdga.com; sets row.error on failure"""
+    try:
+        country_name = None
+        if not row.pdga_id:
+            if not (row.first_name and row.last_name):
+                raise ValueError('A PDGA# or both first & last name are required')
+            found = scrape_id_and_country(row.first_name, row.last_name)
+            if not found or not found[1]:  # a blank search lands on PDGA# 1, which comes back w/o a country
+                raise ValueError('No current pro found on pdga.com')
+            row.pdga_id, country_name = found
+        elif not (row.first_name and row.last_name and row.country_code):
+            first_name, last_name, country_name = _scrape_player_page(row.pdga_id)
+            row.first_name, row.last_name = row.first_name or first_name, row.last_name or last_name
+        if not row.country_code:
+            if not country_name or not (country_code := country_code_from_name(country_name)):
+                raise ValueError(f"Couldn't determine the country code from {country_name!r}")
+            row.country_code = country_code
+    except Exception as e:
+        row.error = f'{type(e).__name__}: {e}' if not isinstance(e, ValueError) else str(e)
+    return row
+
+def _insert_ignoring_conflicts(table):
+    """insert ... on conflict do nothing, for the dialects we run on"""
+    dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(engine.dialect.name)
+    if not dialect_insert:
+        raise NotImplementedError(f"No upsert support for {engine.dialect.name}")
+    return dialect_insert(table).on_conflict_do_nothing()
+
+def resolve_players(rows: list[PlayerImportRow],
+                    max_workers: int = PDGA_MAX_CONCURRENCY) -> tuple[list[dict], list[PlayerImportRow]]:
+    """Resolves the rows concurrently & validates their country codes with one query, w/o writing anything.
+    Returns the dg_player rows to insert (one per PDGA#) & the rows that failed."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(_resolve, rows))
+
+    with get_db_session() as s:
+        valid_codes = set(s.scalars(select(Country.code).where(Country.code.in_({r.country_code for r in rows
+                                                                                  if r.country_code}))))
+    to_insert: dict[int, dict] = {}
+    failed = []
+    for row in rows:
+        if not row.error and row.country_code not in valid_codes:
+            row.error = f"No such country code of {row.country_code} found"
+        if row.error:
+            failed.append(row)
+            continue
+        to_insert.setdefault(row.pdga_id, {'pdga_id': row.pdga_id, 'first_name': row.first_name,
+                                           'last_name': row.last_name, 'division': str(row.division),
+                                           'country_code': row.country_code})
+    return list(to_insert.values()), failed
+
+def insert_players(s: Session, player_rows: list[dict]) -> set[int]:
+    """Inserts resolved dg_player rows w a single insert ... on conflict do nothing, within the caller's
+    session/transaction.  Returns the PDGA#s actually inserted."""
+    if not player_rows:
+        return set()
+    return set(s.scalars(_insert_ignoring_conflicts(Player.__table__).returning(Player.pdga_id), player_rows))
+
+def import_players(rows: list[PlayerImportRow], max_workers: int = PDGA_MAX_CONCURRENCY) -> PlayerImportResult:
+    """Resolves the rows (see resolve_players), then inserts every valid new player with a single
+    insert ... on conflict do nothing.  Players already in dg_player are left alone."""
+    result = PlayerImportResult()
+    player_rows, result.failed = resolve_players(rows, max_workers)
+    if not player_rows:
+        return result
+
+    with get_db_session() as s:
+        inserted = insert_players(s, player_rows)
+    result.inserted = [r['pdga_id'] for r in player_rows if r['pdga_id'] in inserted]
+    result.already_existed = [r['pdga_id'] for r in player_rows if r['pdga_id'] not in inserted]
+    return result
+
+if __name__ == '__main__':
+    import argparse
+    arg_parser = argparse.ArgumentParser(description='Bulk import players from a csv, or PDGA#s / "First Last" args')
+    arg_parser.add_argument('players', nargs='+', help='a .csv path, or PDGA#s and/or quoted "First Last" names')
+    arg_parser.add_argument('--division', default=Division.MPO, type=Division, choices=list(Division))
+    args = arg_parser.parse_args()
+    if len(args.players) == 1 and args.players[0].endswith('.csv'):
+        import_rows = rows_from_csv(args.players[0], args.division)
+    else:
+        import_rows = rows_from_lines(args.players, args.division)
+    import_result = import_players(import_rows)
+    print(f'Inserted {len(import_result.inserted)}: {import_result.inserted}')
+    print(f'Already existed {len(import_result.already_existed)}: {import_result.already_existed}')
+    for failed_row in import_result.failed:
+        print(f'Failed {failed_row.label}: {failed_row.error}')
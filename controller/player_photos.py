@@ -1,24 +1,48 @@
 from bs4 import BeautifulSoup as soup
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
-import requests
+from typing import Callable
 
-BASE_URL = 'https://www.pdga.com/player/'
+from config import PDGA_MAX_CONCURRENCY
+from .pdga_client import get_pdga_client
+
+PLAYER_PATH = '/player/'
 PLAYER_IMG_DEFAULT_URL = 'https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_1280.png'
 
 @dataclass
 class PlayerPhotoUpdater:
+    """Scrapes the players' pdga.com profile pages concurrently (the shared PDGA client still rate limits them).
+    A failed page only skips that player; its error is kept in self.errors.
+    progress, if given, is called with (players done, players total) as each page finishes."""
     ids: list[tuple[int, str]]
+    max_workers: int = PDGA_MAX_CONCURRENCY
+    progress: Callable[[int, int], None] | None = None
     updated_records: list[dict] = field(init=False)
+    errors: dict[int, str] = field(init=False, default_factory=dict)
 
     def __post_init__(self):
         self.updated_records = self._get_updated_player_photo_urls()
 
     def _get_updated_player_photo_urls(self) -> list[dict]:
         """If the player has a new picture, save that new url.  If the player's photo url is None (they were a new add),
-        save the default photo constant.  Return a list of dicts with pdga_id & photo_url."""
+        save the default photo constant.  Return a list of dicts with pdga_id & photo_url, in the order of self.ids."""
+        online_image_urls: dict[int, str | None] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._get_player_image_url, pdga_id): pdga_id for pdga_id, _ in self.ids}
+            for done_cnt, future in enumerate(as_completed(futures), start=1):
+                pdga_id = futures[future]
+                try:
+                    online_image_urls[pdga_id] = future.result()
+                except Exception as e:
+                    self.errors[pdga_id] = f'{type(e).__name__}: {e}'
+                if self.progress:
+                    self.progress(done_cnt, len(futures))
+
         new_photos = []
         for pdga_id, photo_url in self.ids:
-            online_image_url = self._get_player_image_url(pdga_id)
+            if pdga_id in self.errors:
+                continue
+            online_image_url = online_image_urls[pdga_id]
             if online_image_url and online_image_url != photo_url:
                 new_record = {'pdga_id': pdga_id, 'photo_url': online_image_url}
                 new_photos.append(new_record)
@@ -29,8 +53,7 @@ class PlayerPhotoUpdater:
 
     @staticmethod
     def _get_player_image_url(pdga_id: int) -> str | None:
-        url = BASE_URL + str(pdga_id)
-        r = requests.get(url).content
+        r = get_pdga_client().get_text(PLAYER_PATH + str(pdga_id))
         s = soup(r, 'html.parser')
         if photo_element := s.find(rel="gallery-player_photo"):
             return photo_element.find('img').get('src')
@@ -1,4 +1,4 @@
-import requests
+from .pdga_client import get_pdga_client
 
 STATUS = 'Current'
 CLASS = 'P'  # Pro
@@ -14,9 +14,8 @@ def scrape_id_and_country(first_name: str, last_name: str,
     Currently, PDGA.com sorts by PDGA# ascending.
     If found, a pdga_id (int) & the player country (str) is returned as a tuple.
     Example: (73986, 'Estonia')"""
-    url = f'https://www.pdga.com/players'
-    html = requests.get(url, params={'FirstName': first_name, 'LastName': last_name,
-                                     'Status': status, 'Class': class_}).text
+    html = get_pdga_client().get_text('/players', params={'FirstName': first_name, 'LastName': last_name,
+                                                          'Status': status, 'Class': class_})
     try:
         id_start_pos = html.index(ID_START) + len(ID_START)
         id_char_count = html[id_start_pos:].index(ID_END)
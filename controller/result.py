@@ -0,0 +1,64 @@
+from typing import Iterable
+
+from db import engine, get_db_session
+from models import Event, Result
+from .leaderboard import refresh_player_year_aggregates
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+# dg_event.results keys (as cleaned by PDGAEvent) -> dg_result columns
+RESULT_KEY_COL_MAP = {'PDGA#': 'pdga_id', 'Name': 'name', 'Place': 'place', 'Par': 'par',
+                      'Rd1': 'rd1', 'Rd2': 'rd2', 'Rd3': 'rd3', 'Rd4': 'rd4', 'Finals': 'finals', 'Total': 'total',
+                      'Rating': 'rating', 'Prize': 'prize', 'Points': 'points'}
+
+
+def result_rows(event_id: int, div_results: list[dict] | None) -> list[dict]:
+    """Converts a division leaderboard, such as [{'Place': 1, 'PDGA#': 48346, 'Par': -12, ...}], into dg_result rows.
+    Every row has every column so the rows can go through a single executemany."""
+    return [{'event_id': event_id, **{col: r.get(key) for key, col in RESULT_KEY_COL_MAP.items()}}
+            for r in div_results or []]
+
+def replace_event_results(s: Session, event_id: int, div_results: list[dict] | None) -> None:
+    """Replaces the dg_result rows of an event within the caller's session/transaction"""
+    s.execute(delete(Result).where(Result.event_id == event_id))
+    if rows := result_rows(event_id, div_results):
+        s.execute(insert(Result), rows)
+
+def backfill_results() -> int:
+    """Creates dg_result if needed and (re)populates it from every dg_event.results, then refreshes the player-year
+    roll-ups built from it.  Returns the count of rows written."""
+    Result.__table__.create(engine, checkfirst=True)
+    row_cnt = 0
+    with get_db_session() as s:
+        for event_id, div_results in s.execute(select(Event.id, Event.results)):
+            replace_event_results(s, event_id, div_results)
+            row_cnt += len(div_results or [])
+    refresh_player_year_aggregates()
+    return row_cnt
+
+
+def get_avg_finishes(event_ids: Iterable[int] = None, min_events: int = 1,
+                     limit: int = None) -> list[tuple[int, float]]:
+    """Returns [(pdga_id, avg place), ...] ordered by the lowest average place, optionally limited to some events"""
+    avg_place = func.avg(Result.place)
+    query = (select(Result.pdga_id, avg_place).where(Result.place.is_not(None)).
+             group_by(Result.pdga_id).having(func.count(Result.place) >= min_events).order_by(avg_place).limit(limit))
+    if event_ids is not None:
+        query = query.where(Result.event_id.in_(list(event_ids)))
+    with get_db_session() as s:
+        return [(pdga_id, float(avg)) for pdga_id, avg in s.execute(query)]
+
+def get_top_finish_counts(max_place: int, event_ids: Iterable[int] = None,
+                          limit: int = None) -> list[tuple[int, int]]:
+    """Returns [(pdga_id, count of finishes at or better than max_place), ...] ordered by the most such finishes"""
+    finish_cnt = func.count()
+    query = (select(Result.pdga_id, finish_cnt).where(Result.place <= max_place).
+             group_by(Result.pdga_id).order_by(finish_cnt.desc()).limit(limit))
+    if event_ids is not None:
+        query = query.where(Result.event_id.in_(list(event_ids)))
+    with get_db_session() as s:
+        return [tuple(row) for row in s.execute(query)]
+
+
+if __name__ == '__main__':
+    print(f'Backfilled {backfill_results()} dg_result rows')
@@ -1,9 +1,8 @@
-from db import get_db_session
+from db import read_mappings
 from models import Season
+from sqlalchemy import select
 
 def get_all_seasons() -> list[dict]:
-    with get_db_session() as s:
-        events = s.query(Season).all()
-        return [e.k_v for e in events]
+    return [Season.row_k_v(row) for row in read_mappings(select(Season.__table__))]
 
 
@@ -1,14 +1,12 @@
 from datetime import date, datetime
 
-from db import get_db_session
+from db import get_db_session, read_mappings
 from flask import abort
 from models import Tournament
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 def get_all_tourneys() -> list[dict]:
-    with get_db_session() as s:
-        results = s.query(Tournament).all()
-        return [e.k_v for e in results]
+    return read_mappings(select(Tournament.__table__))
 
 def get_all_tourneys_as_classes() -> list[Tournament]:
     with get_db_session() as s:
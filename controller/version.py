@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from hashlib import sha1
+from threading import Lock
+import time
+
+from config import DATA_VERSION_TTL_SECONDS
+from db import get_db_session
+from models import Event, Player, Tournament
+from sqlalchemy import func, select
+
+VERSIONED_MODELS = (Event, Player, Tournament)
+# Part of every ETag: bump it when the JSON wire format changes, so clients don't keep bodies cached in the old format
+# 2: orjson (ISO 8601 dates, keys in insertion order instead of sorted)
+RESPONSE_FORMAT_VERSION = 2
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """A cheap fingerprint of the results data: the latest lmt, the latest created_ts & the row count of each table.
+    Any insert, update or delete on dg_event, dg_player or dg_tourney produces a different version."""
+    stamps: tuple[tuple[datetime | None, datetime | None, int], ...]
+
+    @property
+    def etag(self) -> str:
+        return sha1(repr((RESPONSE_FORMAT_VERSION, self.stamps)).encode()).hexdigest()
+
+    @property
+    def last_modified(self) -> datetime | None:
+        """The newest lmt/created_ts across the tables, as UTC & truncated to seconds for http dates.
+        Postgres returns them tz-aware (timestamptz); SQLite returns them naive, but its CURRENT_TIMESTAMP is UTC."""
+        timestamps = [ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+                      for lmt, created_ts, _ in self.stamps for ts in (lmt, created_ts) if ts]
+        if not timestamps:
+            return None
+        return max(timestamps).astimezone(timezone.utc).replace(microsecond=0)
+
+
+_version: DataVersion | None = None
+_version_checked_at = 0.0
+_version_lock = Lock()
+
+def _query_data_version() -> DataVersion:
+    """One round trip of max()/count() aggregates; no rows are hydrated"""
+    cols = []
+    for model in VERSIONED_MODELS:
+        cols += [select(func.max(model.lmt)).scalar_subquery(),
+                 select(func.max(model.created_ts)).scalar_subquery(),
+                 select(func.count()).select_from(model).scalar_subquery()]
+    with get_db_session() as s:
+        row = s.execute(select(*cols)).one()
+    return DataVersion(tuple(tuple(row[i:i + 3]) for i in range(0, len(row), 3)))
+
+def invalidate_data_version() -> None:
+    """Call after writing results data, so this process's next request sees the new version right away"""
+    global _version
+    with _version_lock:
+        _version = None
+
+def get_data_version() -> DataVersion:
+    """The data version, queried at most every DATA_VERSION_TTL_SECONDS per process (or after
+    invalidate_data_version), so a burst of requests, 304s included, shares one round trip"""
+    global _version, _version_checked_at
+    with _version_lock:
+        if _version is None or time.monotonic() - _version_checked_at >= DATA_VERSION_TTL_SECONDS:
+            _version = _query_data_version()
+            _version_checked_at = time.monotonic()
+        return _version
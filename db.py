@@ -1,14 +1,92 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import os
+from threading import Lock
+import time
+from typing import Iterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from config import (DB_CONN_STR, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE_SECONDS, DB_POOL_SIZE,
+                    DB_POOL_TIMEOUT_SECONDS)
+
+
+@dataclass
+class PoolStats:
+    """Running totals of connection checkouts from this process's pool"""
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
 
-from config import CONN_STR_UNPACKED, DB_CONN_STR
-import psycopg2
+class TimedQueuePool(QueuePool):
+    """A QueuePool that also records how long each checkout waited for a connection"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()  # a recreated pool (e.g. after a fork) starts counting afresh
+        self._stats_lock = Lock()
 
-# SQLAlchemy
-engine = create_engine(DB_CONN_STR)
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.stats.checkouts += 1
+                self.stats.wait_seconds_total += waited
+                self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+
+
+# SQLAlchemy: the one engine & pool, shared by the ORM sessions & the raw DBAPI cursors below
+engine = create_engine(DB_CONN_STR, poolclass=TimedQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                       pool_timeout=DB_POOL_TIMEOUT_SECONDS, pool_recycle=DB_POOL_RECYCLE_SECONDS,
+                       pool_pre_ping=DB_POOL_PRE_PING)
 Session = sessionmaker(bind=engine)
 
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, 'connect')
+    def _enforce_sqlite_foreign_keys(dbapi_connection, connection_record):
+        """Local mode: SQLite only honors foreign keys (& ON DELETE CASCADE) when asked, per connection"""
+        dbapi_connection.execute('pragma foreign_keys = on')
+
+# A forked child (e.g. a gunicorn worker w --preload) must not reuse the parent's sockets; it starts a fresh pool
+os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
+
+def pool_metrics() -> dict:
+    """A snapshot of this process's pool, served as the dg_db_pool_* gauges of /metrics (instrumentation.py).
+    Each gunicorn worker has its own pool, hence the pid."""
+    pool: TimedQueuePool = engine.pool
+    stats = asdict(pool.stats)
+    return {'pid': os.getpid(), 'size': pool.size(), 'checked_out': pool.checkedout(), 'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0), 'max_overflow': DB_MAX_OVERFLOW, **stats,
+            'wait_seconds_avg': stats['wait_seconds_total'] / stats['checkouts'] if stats['checkouts'] else 0.0}
+
+
+@contextmanager
+def count_statements() -> Iterator[list[str]]:
+    """Collects the SQL statements the engine sends inside the block, e.g. to catch N+1 lazy loads.
+    It counts every thread's statements, so use it where nothing else is querying."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
 @contextmanager
 def get_db_session():
     """Connects to and yields a database connection through SQLAlchemy's sessionmaker"""
@@ -23,24 +101,37 @@ def get_db_session():
         session.close()
 
 
+@contextmanager
+def get_read_connection():
+    """Yields a Core connection for reads: rows come back as plain tuples/mappings (no ORM instances or identity map)
+    & the transaction is rolled back, not committed.  On Postgres, the transaction is also declared READ ONLY."""
+    options = {'postgresql_readonly': True} if engine.dialect.name == 'postgresql' else {}
+    with engine.connect().execution_options(**options) as conn:
+        yield conn
+
+
+def read_mappings(statement) -> list[dict]:
+    """Runs a select on a read connection & returns its rows as dicts keyed by column label"""
+    with get_read_connection() as conn:
+        return [dict(row) for row in conn.execute(statement).mappings()]
+
+
 @contextmanager
 def get_cursor_w_commit():
-    """Using raw psycopg2, connect to & yield a database connection.  Commits the transaction, if no error"""
-    conn = None
+    """Checks out a raw DBAPI (psycopg2) connection from the engine's pool & yields a cursor.
+    Commits the transaction, if no error, then returns the connection to the pool."""
+    conn = engine.raw_connection()
     cursor = None
     try:
-        conn = psycopg2.connect(CONN_STR_UNPACKED)
         cursor = conn.cursor()
         yield cursor
         conn.commit()
-    except Exception as e:
+    except Exception:
         # Roll back in case of exception
-        if conn:
-            conn.rollback()
+        conn.rollback()
         raise
     finally:
-        # Close the cursor and connection
+        # Close the cursor & hand the connection back to the pool
         if cursor:
             cursor.close()
-        if conn:
-            conn.close()
+        conn.close()
@@ -0,0 +1,132 @@
+"""Export/import the database as a snapshot directory of Arrow IPC files, one per table: columnar, dates stored as
+ints (date32 days, int64 microseconds), & memory-mappable, so reading it is lazy & needs no Python to be executed.
+It replaces the backup_data.py literal dump.
+Run: python db_snapshot.py export|import|check|convert [path]
+import only targets SQLite (i.e. DB_MODE=local); convert writes backup_data.py as a snapshot w/o connecting to a db"""
+import json
+from pathlib import Path
+import tempfile
+
+import pyarrow as pa
+from db import engine
+from models import Base
+from sqlalchemy import JSON, Date, DateTime, Engine, Float, Integer, create_engine, select
+
+SNAPSHOT_TABLES = ('country', 'dg_tourney', 'dg_player', 'dg_event', 'dg_result', 'dg_season')  # in FK order
+DEFAULT_SNAPSHOT_PATH = 'snapshot'
+
+
+def _arrow_type(column) -> pa.DataType:
+    if isinstance(column.type, JSON):
+        return pa.large_string()  # JSON text; the leaderboards are the bulk of the bytes
+    if isinstance(column.type, DateTime):
+        return pa.timestamp('us', tz='UTC') if column.type.timezone else pa.timestamp('us')
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    return pa.string()
+
+def _json_columns(table_name: str) -> list[str]:
+    return [c.name for c in Base.metadata.tables[table_name].columns if isinstance(c.type, JSON)]
+
+
+def write_snapshot(path: str | Path, rows_by_table: dict[str, list[dict]], compression: str | None = None) -> None:
+    """Writes each table's rows to path/<table>.arrow.  Uncompressed files can be memory-mapped w/o a copy;
+    compression ('zstd' or 'lz4') makes them smaller but has to be decoded on read."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    for table_name, rows in rows_by_table.items():
+        table = Base.metadata.tables[table_name]
+        json_columns = _json_columns(table_name)
+        arrays, fields = [], []
+        for column in table.columns:
+            values = [row.get(column.name) for row in rows]
+            if column.name in json_columns:
+                values = [json.dumps(v) if v is not None else None for v in values]
+            arrays.append(pa.array(values, type=_arrow_type(column)))
+            fields.append(pa.field(column.name, _arrow_type(column)))
+        with pa.ipc.new_file(path / f'{table_name}.arrow', pa.schema(fields), options=options) as writer:
+            writer.write_table(pa.Table.from_arrays(arrays, schema=pa.schema(fields)))
+
+def export_snapshot(path: str | Path = DEFAULT_SNAPSHOT_PATH, source: Engine = engine,
+                    compression: str | None = None) -> dict[str, int]:
+    """Writes every snapshot table of the source database, ordered by primary key.  Returns the row count per table."""
+    rows_by_table = {}
+    with source.connect() as conn:
+        for table_name in SNAPSHOT_TABLES:
+            table = Base.metadata.tables[table_name]
+            rows_by_table[table_name] = [dict(row) for row in conn.execute(
+                select(table).order_by(*table.primary_key.columns)).mappings()]
+    write_snapshot(path, rows_by_table, compression)
+    return {table_name: len(rows) for table_name, rows in rows_by_table.items()}
+
+
+def read_snapshot(path: str | Path = DEFAULT_SNAPSHOT_PATH, memory_map: bool = True) -> dict[str, pa.Table]:
+    """Opens each table of a snapshot.  Memory-mapped, uncompressed columns are only paged in as they're used."""
+    tables = {}
+    for table_name in SNAPSHOT_TABLES:
+        file = Path(path) / f'{table_name}.arrow'
+        if file.exists():
+            source = pa.memory_map(str(file)) if memory_map else pa.OSFile(str(file))
+            tables[table_name] = pa.ipc.open_file(source).read_all()
+    return tables
+
+def snapshot_rows(table_name: str, table: pa.Table) -> list[dict]:
+    """A snapshot table as row dicts, w its JSON columns parsed, ready for an executemany insert"""
+    rows = table.to_pylist()
+    for column in _json_columns(table_name):
+        for row in rows:
+            if row[column] is not None:
+                row[column] = json.loads(row[column])
+    return rows
+
+
+def import_snapshot(path: str | Path = DEFAULT_SNAPSHOT_PATH, target: Engine = engine) -> dict[str, int]:
+    """Resets the target (SQLite only) to the snapshot, see local_db.reset_local_db.  Returns the row count per
+    table."""
+    from local_db import reset_local_db
+    return reset_local_db({table_name: snapshot_rows(table_name, table)
+                           for table_name, table in read_snapshot(path).items()}, target)
+
+
+def check_round_trip(source: Engine = engine) -> dict[str, int]:
+    """Exports the source database, imports the snapshot into a scratch in-memory SQLite database, & compares every
+    table row for row.  Raises a ValueError on the first mismatch; returns the row count per table."""
+    def table_rows(conn, table_name: str) -> list[dict]:
+        table = Base.metadata.tables[table_name]
+        return [dict(row) for row in conn.execute(select(table).order_by(*table.primary_key.columns)).mappings()]
+
+    scratch = create_engine('sqlite://')
+    with tempfile.TemporaryDirectory() as tmp:
+        counts = export_snapshot(tmp, source)
+        import_snapshot(tmp, scratch)
+    with source.connect() as source_conn, scratch.connect() as scratch_conn:
+        for table_name in SNAPSHOT_TABLES:
+            expected, actual = table_rows(source_conn, table_name), table_rows(scratch_conn, table_name)
+            if expected != actual:
+                mismatch = next((e, a) for e, a in zip(expected + [None], actual + [None]) if e != a)
+                raise ValueError(f"{table_name} didn't round trip: {mismatch}")
+    return counts
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    command, snapshot_path = (sys.argv[1:] + [None, DEFAULT_SNAPSHOT_PATH])[:2]
+
+    def convert_backup_data() -> dict[str, int]:
+        from local_db import backup_rows
+        rows_by_table = backup_rows()
+        write_snapshot(snapshot_path, rows_by_table)
+        return {table_name: len(rows) for table_name, rows in rows_by_table.items()}
+
+    commands = {'export': lambda: export_snapshot(snapshot_path), 'import': lambda: import_snapshot(snapshot_path),
+                'check': check_round_trip, 'convert': convert_backup_data}
+    if command not in commands:
+        sys.exit(__doc__)
+    start = time.perf_counter()
+    print(f"{command}: {commands[command]()} in {time.perf_counter() - start:.2f}s")
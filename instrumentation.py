@@ -0,0 +1,212 @@
+"""Per-request instrumentation for the Flask app: DB time & statement count (from engine events), named phases (e.g.
+building, flattening & serializing the payload) & response size.  Every response gets a Server-Timing header,
+/metrics serves this process's running totals in the Prometheus text format, and (when PROFILER_ENABLED) a request
+sent w an X-Profile: 1 header is answered w a sampled profile of itself instead of its body."""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import os
+import sys
+from threading import Event as ThreadEvent, Lock, Thread, get_ident
+import time
+from typing import Iterator
+
+from config import PROFILER_ENABLED, PROFILER_INTERVAL_SECONDS
+from db import engine, pool_metrics
+from flask import Flask, Response, g, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_HEADER = 'X-Profile'
+
+
+@dataclass
+class RequestTiming:
+    start: float = field(default_factory=time.perf_counter)
+    db_seconds: float = 0.0
+    db_statements: int = 0
+    phases: dict[str, float] = field(default_factory=dict)
+
+_current: ContextVar[RequestTiming | None] = ContextVar('request_timing', default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Adds the block's wall time to the current request's named phase; a no-op outside of a request"""
+    timing = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timing:
+            timing.phases[name] = timing.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._instrumentation_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if timing := _current.get():
+        timing.db_seconds += time.perf_counter() - context._instrumentation_start
+        timing.db_statements += 1
+
+
+class RequestMetrics:
+    """This process's running totals per endpoint.  Each gunicorn worker keeps its own, so scrape them per worker
+    (the pid is a label) or sum them in the query."""
+    def __init__(self):
+        self._lock = Lock()
+        self.requests = Counter()  # (endpoint, method, status) -> count
+        self.sums = defaultdict(Counter)  # endpoint -> {'seconds': ..., 'db_seconds': ..., ...}
+        self.latency_buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))  # endpoint -> cumulative counts
+
+    def observe(self, endpoint: str, method: str, status: int, seconds: float, timing: RequestTiming,
+                payload_bytes: int) -> None:
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            sums = self.sums[endpoint]
+            sums['seconds'] += seconds
+            sums['db_seconds'] += timing.db_seconds
+            sums['db_statements'] += timing.db_statements
+            sums['serialize_seconds'] += timing.phases.get('serialize', 0.0)
+            sums['response_bytes'] += payload_bytes
+            sums['count'] += 1
+            buckets = self.latency_buckets[endpoint]
+            for i, upper_bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= upper_bound:
+                    buckets[i] += 1
+
+    def prometheus_text(self) -> str:
+        pid = os.getpid()
+        lines = ['# TYPE dg_http_requests_total counter']
+        with self._lock:
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'dg_http_requests_total{{pid="{pid}",endpoint="{endpoint}",method="{method}",'
+                             f'status="{status}"}} {count}')
+            lines.append('# TYPE dg_http_request_seconds histogram')
+            for endpoint, buckets in sorted(self.latency_buckets.items()):
+                labels = f'pid="{pid}",endpoint="{endpoint}"'
+                for upper_bound, count in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'dg_http_request_seconds_bucket{{{labels},le="{upper_bound}"}} {count}')
+                sums = self.sums[endpoint]
+                lines.append(f'dg_http_request_seconds_bucket{{{labels},le="+Inf"}} {sums["count"]}')
+                lines.append(f'dg_http_request_seconds_sum{{{labels}}} {sums["seconds"]}')
+                lines.append(f'dg_http_request_seconds_count{{{labels}}} {sums["count"]}')
+            for metric, kind in (('db_seconds', 'counter'), ('db_statements', 'counter'),
+                                 ('serialize_seconds', 'counter'), ('response_bytes', 'counter')):
+                lines.append(f'# TYPE dg_http_request_{metric}_total {kind}')
+                for endpoint, sums in sorted(self.sums.items()):
+                    lines.append(f'dg_http_request_{metric}_total{{pid="{pid}",endpoint="{endpoint}"}} {sums[metric]}')
+        lines.append('# TYPE dg_db_pool gauge')
+        for key, value in pool_metrics().items():
+            if key != 'pid':
+                lines.append(f'dg_db_pool_{key}{{pid="{pid}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class StackSampler:
+    """A sampling profiler for one thread: a background thread records its Python stack every interval.
+    The report lists the hottest functions (inclusive & self %) & the collapsed stacks, which flamegraph.pl
+    or speedscope can draw."""
+    def __init__(self, thread_id: int, interval: float = PROFILER_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = ThreadEvent()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._started_at = self._stopped_at = 0.0
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._stopped_at = time.perf_counter()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame:
+                stack.append(f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def report(self, top: int = 30) -> str:
+        samples = sum(self.stacks.values())
+        inclusive, leaf = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            leaf[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        lines = [f'{samples} samples every {self.interval * 1000:g}ms over '
+                 f'{self._stopped_at - self._started_at:.3f}s', '', ' incl%   self%  function']
+        for frame, count in inclusive.most_common(top):
+            lines.append(f'{100 * count / (samples or 1):6.1f}  {100 * leaf[frame] / (samples or 1):6.1f}  {frame}')
+        lines += ['', '# collapsed stacks: stack count']
+        lines += [f'{stack} {count}' for stack, count in self.stacks.most_common()]
+        return '\n'.join(lines) + '\n'
+
+
+def _server_timing(timing: RequestTiming, total: float, payload_bytes: int) -> str:
+    metrics = [f'db;dur={timing.db_seconds * 1000:.1f};desc="{timing.db_statements} queries"']
+    metrics += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timing.phases.items()]
+    metrics += [f'payload;desc="{payload_bytes} bytes"', f'total;dur={total * 1000:.1f}']
+    return ', '.join(metrics)
+
+
+def init_app(app: Flask, metrics: RequestMetrics = None) -> RequestMetrics:
+    """Instruments the app & adds its /metrics route.
+    Call it after setting app.json, whose response method (i.e. jsonify) is timed as the serialize phase."""
+    metrics = metrics or RequestMetrics()
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    json_response = app.json.response
+
+    def timed_json_response(*args, **kwargs) -> Response:
+        with phase('serialize'):
+            return json_response(*args, **kwargs)
+    app.json.response = timed_json_response
+
+    @app.before_request
+    def start_timing():
+        g.timing_token = _current.set(RequestTiming())
+        if PROFILER_ENABLED and request.headers.get(PROFILE_HEADER) == '1':
+            g.sampler = StackSampler(get_ident())
+            g.sampler.start()
+
+    @app.after_request
+    def finish_timing(response: Response) -> Response:
+        timing = _current.get()
+        if not timing:
+            return response
+        total = time.perf_counter() - timing.start
+        payload_bytes = response.calculate_content_length() or 0
+        response.headers['Server-Timing'] = _server_timing(timing, total, payload_bytes)
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        if endpoint != '/metrics':
+            metrics.observe(endpoint, request.method, response.status_code, total, timing, payload_bytes)
+        if sampler := g.pop('sampler', None):
+            sampler.stop()
+            profiled = Response(sampler.report(), mimetype='text/plain')
+            profiled.headers['Server-Timing'] = response.headers['Server-Timing']
+            return profiled
+        return response
+
+    @app.teardown_request
+    def reset_timing(exc):
+        if token := g.pop('timing_token', None):
+            _current.reset(token)
+
+    @app.route('/metrics')
+    def prometheus_metrics() -> Response:
+        return Response(metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
@@ -0,0 +1,87 @@
+"""Builds the local (DB_MODE=local) SQLite database from backup_data.py & countries.txt (or from a db_snapshot
+directory), so the API, dashboard & benchmarks run w/o Postgres or a network.
+Run: DB_MODE=local python local_db.py [snapshot_dir]"""
+import datetime
+from pathlib import Path
+import time
+from typing import Mapping
+
+from config import DB_MODE
+from db import engine
+from models import Base, Country, Event, Player, Tournament
+from sqlalchemy import Engine, insert
+
+basedir = Path(__file__).parent.resolve()
+
+
+def read_backup_data() -> dict[str, list[dict]]:
+    """The players, tourneys & events lists from backup_data.py (Python literals that reference datetime)"""
+    namespace = {'datetime': datetime}
+    exec((basedir / 'backup_data.py').read_text(encoding='utf-8'), namespace)
+    return {k: namespace[k] for k in ('players', 'tourneys', 'events')}
+
+def read_countries() -> list[dict]:
+    """countries.txt lines look like: US :flag-us: 🇺🇸 United States"""
+    countries = []
+    for line in (basedir / 'countries.txt').read_text(encoding='utf-8').splitlines():
+        code, flag_emoji_code, flag_emoji, name = line.split(' ', 3)
+        countries.append({'code': code, 'flag_emoji_code': flag_emoji_code, 'flag_emoji': flag_emoji, 'name': name})
+    return countries
+
+def _columns_only(rows: list[dict], model) -> list[dict]:
+    """Drops the backup's derived keys (full_name, year, tourney_name ...) that aren't columns"""
+    columns = set(model.__table__.columns.keys())
+    return [{k: v for k, v in row.items() if k in columns} for row in rows]
+
+def backup_rows() -> dict[str, list[dict]]:
+    """The countries & backup snapshot as insertable rows per table name.
+    The backup predates dg_event.division, so it's set from the winner, like migrate.migrate_event_division;
+    a duplicate (tourney, end date, division) keeps the lowest event id."""
+    backup = read_backup_data()
+    player_divisions = {p['pdga_id']: p['division'] for p in backup['players']}
+    events, event_keys = [], set()
+    for event in sorted(_columns_only(backup['events'], Event), key=lambda e: e['id']):
+        event['division'] = player_divisions[event['winner_id']]
+        if (key := (event['tourney_id'], event['end_date'], event['division'])) in event_keys:
+            print(f"Skipping event {event['id']}: a duplicate of {key}")
+            continue
+        event_keys.add(key)
+        events.append(event)
+    return {Country.__tablename__: read_countries(),
+            Tournament.__tablename__: _columns_only(backup['tourneys'], Tournament),
+            Player.__tablename__: _columns_only(backup['players'], Player), Event.__tablename__: events}
+
+def reset_local_db(rows_by_table: Mapping[str, list[dict]], target: Engine = engine) -> dict[str, int]:
+    """Drops & recreates the target's tables, then bulk inserts the rows (one executemany per table, in the given
+    order, so FK order) & rebuilds the leaderboard aggregates of the app's engine.  Returns the row count per table.
+    Refuses to run against anything but SQLite, so it can't wipe the production database."""
+    if target.dialect.name != 'sqlite':
+        raise ValueError(f"Refusing to reset a {target.dialect.name} database; set DB_MODE=local")
+    Base.metadata.drop_all(target)
+    Base.metadata.create_all(target)
+    with target.begin() as conn:
+        for table_name, table_rows in rows_by_table.items():
+            if table_rows:
+                conn.execute(insert(Base.metadata.tables[table_name]), table_rows)
+
+    if target is engine:
+        from controller.leaderboard import refresh_player_year_aggregates
+        refresh_player_year_aggregates()
+    return {table_name: len(table_rows) for table_name, table_rows in rows_by_table.items()}
+
+def load_backup_snapshot() -> dict[str, int]:
+    """Resets the local database to backup_rows() (see reset_local_db).  Returns the row count per table."""
+    return reset_local_db(backup_rows())
+
+if __name__ == '__main__':
+    if DB_MODE != 'local':
+        print('Set DB_MODE=local (in the environment or .env) to build the local database')
+    else:
+        import sys
+        start = time.perf_counter()
+        if len(sys.argv) > 1:  # a db_snapshot directory, instead of backup_data.py
+            from db_snapshot import import_snapshot
+            counts = import_snapshot(sys.argv[1])
+        else:
+            counts = load_backup_snapshot()
+        print(f"Loaded {counts} into {engine.url.database} in {time.perf_counter() - start:.2f}s")
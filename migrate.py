@@ -0,0 +1,136 @@
+"""Brings an existing database up to models.py: creates the missing tables, adds the missing columns & backfills them,
+then adds the constraints.  Every step checks the schema first, so it's safe to re-run; it all runs in one transaction.
+Run: python migrate.py"""
+from db import engine
+from models import Base, Event, Player, Result
+from sqlalchemy import (Column, Connection, DateTime, Engine, Index, UniqueConstraint, and_, func, inspect, select,
+                        text, update)
+from sqlalchemy.schema import AddConstraint
+
+
+def _add_column(conn: Connection, column: Column) -> bool:
+    """alter table ... add column, unless the column already exists.  Returns whether it was added."""
+    if column.name in {c['name'] for c in inspect(conn).get_columns(column.table.name)}:
+        return False
+    conn.execute(text(f'alter table {column.table.name} add column {column.name} '
+                      f'{column.type.compile(dialect=conn.dialect)}'))
+    return True
+
+def _add_unique_constraint(conn: Connection, constraint: UniqueConstraint) -> bool:
+    """alter table ... add constraint, unless one of that name already exists.  Returns whether it was added.
+    SQLite can't add a constraint to a table, so there it's a unique index of the same name."""
+    inspector = inspect(conn)
+    if constraint.name in {c['name'] for c in inspector.get_unique_constraints(constraint.table.name) +
+                           inspector.get_indexes(constraint.table.name)}:
+        return False
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text(f'create unique index {constraint.name} on {constraint.table.name} '
+                          f'({", ".join(c.name for c in constraint.columns)})'))
+    else:
+        conn.execute(AddConstraint(constraint))
+    return True
+
+def _add_index(conn: Connection, index: Index) -> bool:
+    """create index ..., unless one of that name already exists.  Returns whether it was added."""
+    if index.name in {i['name'] for i in inspect(conn).get_indexes(index.table.name)}:
+        return False
+    index.create(conn)
+    return True
+
+
+def migrate_event_division(conn: Connection) -> list[str]:
+    """dg_event.division: adds the column, sets it from each event's winner, then adds uq_dg_event_tourney_end_div.
+    If events share a (tourney_id, end_date, division) key, it raises a ValueError listing them instead, which rolls
+    back the whole migration: a person has to decide which of those rows is wrong.  Returns what it did."""
+    done = []
+    if _add_column(conn, Event.__table__.c.division):
+        done.append('added dg_event.division')
+
+    winner_division = select(Player.division).where(Player.pdga_id == Event.winner_id).scalar_subquery()
+    if backfilled := conn.execute(update(Event).where(Event.division.is_(None)).
+                                  values(division=winner_division)).rowcount:
+        done.append(f'set the division of {backfilled} dg_event rows from their winners')
+
+    if duplicates := get_duplicate_events(conn):
+        lines = [f'tourney {tourney_id} ending {end_date} ({division}): ' +
+                 ', '.join(f'dg_event {event_id} won by {winner_id}' for event_id, winner_id in events)
+                 for (tourney_id, end_date, division), events in duplicates.items()]
+        raise ValueError('Stopped before adding uq_dg_event_tourney_end_div: these events share a tourney, end date '
+                         '& division.  Delete or correct the wrong ones, then re-run.\n' + '\n'.join(lines))
+
+    uq_event = next(c for c in Event.__table__.constraints if c.name == 'uq_dg_event_tourney_end_div')
+    if _add_unique_constraint(conn, uq_event):
+        done.append(f'added {uq_event.name}')
+    return done
+
+def get_duplicate_events(conn: Connection) -> dict[tuple, list[tuple[int, int]]]:
+    """{(tourney_id, end_date, division): [(event id, winner_id), ...]} for every key held by more than one event"""
+    key_cols = (Event.tourney_id, Event.end_date, Event.division)
+    duplicate_keys = select(*key_cols).group_by(*key_cols).having(func.count() > 1).subquery()
+    rows = conn.execute(select(*key_cols, Event.id, Event.winner_id).
+                        join(duplicate_keys, and_(*(c == duplicate_keys.c[c.key] for c in key_cols))).
+                        order_by(*key_cols, Event.id))
+    duplicates = {}
+    for tourney_id, end_date, division, event_id, winner_id in rows:
+        duplicates.setdefault((tourney_id, end_date, division), []).append((event_id, winner_id))
+    return duplicates
+
+
+def migrate_event_indexes(conn: Connection) -> list[str]:
+    """dg_event's indexes, e.g. ix_dg_event_end_date for the roll-up refresh's date ranges: create_all skips them
+    on an existing table"""
+    return [f'added {index.name}' for index in sorted(Event.__table__.indexes, key=lambda i: i.name)
+            if _add_index(conn, index)]
+
+
+def migrate_player_photo_checked_ts(conn: Connection) -> list[str]:
+    """dg_player.photo_checked_ts: adds the column; it stays NULL (i.e. due for a check) until the next photo refresh"""
+    return ['added dg_player.photo_checked_ts'] if _add_column(conn, Player.__table__.c.photo_checked_ts) else []
+
+
+def migrate_timestamps_to_timestamptz(conn: Connection) -> list[str]:
+    """The created_ts & lmt columns were naive timestamps filled by now(), i.e. in the db server's time zone.
+    On Postgres, converts each to timestamptz, reading the existing values in that zone, so Last-Modified is true UTC.
+    SQLite has no column types to change; its CURRENT_TIMESTAMP is already UTC."""
+    if conn.dialect.name != 'postgresql':
+        return []
+    done = []
+    for table in Base.metadata.sorted_tables:
+        db_columns = {c['name']: c['type'] for c in inspect(conn).get_columns(table.name)}
+        for column in table.columns:
+            if (isinstance(column.type, DateTime) and column.type.timezone and column.name in db_columns
+                    and not getattr(db_columns[column.name], 'timezone', False)):
+                conn.execute(text(f"alter table {table.name} alter column {column.name} type timestamp with time zone "
+                                  f"using {column.name} at time zone current_setting('TimeZone')"))
+                done.append(f'converted {table.name}.{column.name} to timestamptz')
+    return done
+
+
+def migrate(target: Engine = engine) -> list[str]:
+    """Runs every step in one transaction.  Returns what was done; nothing when the schema is already current.
+    Raises a ValueError, having changed nothing, when a step needs a person to fix the data first.
+    Afterwards, a new dg_result is filled from dg_event.results, and the player-year roll-ups are refreshed."""
+    with target.begin() as conn:
+        existing_tables = set(inspect(conn).get_table_names())
+        done = [f'created {table.name}' for table in Base.metadata.sorted_tables if table.name not in existing_tables]
+        Base.metadata.create_all(conn)  # only the missing tables
+        done += migrate_event_division(conn)
+        done += migrate_event_indexes(conn)
+        done += migrate_player_photo_checked_ts(conn)
+        done += migrate_timestamps_to_timestamptz(conn)
+    if done and target is engine:
+        from controller.leaderboard import refresh_player_year_aggregates
+        from controller.result import backfill_results
+        if f'created {Result.__tablename__}' in done:
+            done.append(f'backfilled {backfill_results()} {Result.__tablename__} rows')  # & refreshed the roll-ups
+        else:
+            refresh_player_year_aggregates()
+    return done
+
+
+if __name__ == '__main__':
+    import sys
+    try:
+        print('\n'.join(migrate()) or 'The database is up to date')
+    except ValueError as e:
+        sys.exit(str(e))
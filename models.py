@@ -1,7 +1,9 @@
 from datetime import date, datetime
+from typing import Mapping
 
 from db import engine
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import (Column, Date, DateTime, Float, ForeignKey, Index, Integer, JSON, String, UniqueConstraint,
+                        func)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -16,8 +18,8 @@ class Tournament(Base):
     name: str = Column(String)
     effective_date: date = Column(Date)
     expiry_date: date = Column(Date, default=None)
-    created_ts = Column(DateTime, default=func.now())
-    lmt = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_ts = Column(DateTime(timezone=True), default=func.now())
+    lmt = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
 
     @property
     def k_v(self) -> dict:
@@ -44,11 +46,19 @@ class Player(Base):
     last_name: str = Column(String)
     division: str = Column(String)
     photo_url: str = Column(String, default=None)
+    photo_checked_ts = Column(DateTime, nullable=True)  # the last time photo_url was checked against pdga.com
     country_code: str = Column(String, ForeignKey('country.code'))
-    created_ts = Column(DateTime, default=func.now())
-    lmt = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_ts = Column(DateTime(timezone=True), default=func.now())
+    lmt = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     country = relationship("Country")
 
+    INTERNAL_COLUMNS = ('photo_checked_ts', )  # bookkeeping, left out of what the app & API read
+
+    @classmethod
+    def read_columns(cls) -> list[Column]:
+        """dg_player's columns, less INTERNAL_COLUMNS, for the read selects"""
+        return [c for c in cls.__table__.c if c.key not in cls.INTERNAL_COLUMNS]
+
     @property
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}"
@@ -56,10 +66,16 @@ class Player(Base):
     @property
     def k_v(self) -> dict:
         # the first entry in a Base instance dict is some sqlalchemy junk, hence  "idx > 0"
-        instance_dict = {k: v for idx, (k, v) in enumerate(self.__dict__.items()) if idx > 0}
+        instance_dict = {k: v for idx, (k, v) in enumerate(self.__dict__.items())
+                         if idx > 0 and k not in self.INTERNAL_COLUMNS}
         instance_dict['full_name'] = self.full_name
         return instance_dict
 
+    @staticmethod
+    def row_k_v(row: Mapping) -> dict:
+        """The k_v of a Core row of dg_player, w/o building an instance"""
+        return {**row, 'full_name': f"{row['first_name']} {row['last_name']}"}
+
 
 class Event(Base):
     __tablename__ = 'dg_event'
@@ -74,13 +90,17 @@ class Event(Base):
     state: str = Column(String, nullable=True)
     country_code: str = Column(String, ForeignKey('country.code'))
     pdga_event_id: str = Column(Integer)
-    results: list[dict] = Column(JSONB, nullable=True)
-    created_ts = Column(DateTime, default=func.now())
-    lmt = Column(DateTime, default=func.now(), onupdate=func.now())
+    results: list[dict] = Column(JSONB().with_variant(JSON(), 'sqlite'), nullable=True)  # JSON in local mode
+    division: str = Column(String, nullable=True)  # the winner's division, for the unique key; see migrate.py
+    created_ts = Column(DateTime(timezone=True), default=func.now())
+    lmt = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     tourney = relationship("Tournament")
     winner = relationship('Player')
     country = relationship('Country')
 
+    __table_args__ = (UniqueConstraint('tourney_id', 'end_date', 'division', name='uq_dg_event_tourney_end_div'),
+                      Index('ix_dg_event_end_date', 'end_date'))
+
     @property
     def year(self) -> int:
         return self.end_date.year
@@ -88,12 +108,87 @@ class Event(Base):
     @property
     def k_v(self) -> dict:
         # the first entry in a Base instance dict is some sqlalchemy junk, hence  "idx > 0"
-        instance_dict = {k: v for idx, (k, v) in enumerate(self.__dict__.items()) if idx > 0}
+        # tourney & country are lazy: load Events w joinedload(Event.tourney), joinedload(Event.country) to avoid
+        # 2 queries per event, or read them w Event.row_k_v (see controller.event.get_all_events)
+        relationships = self.__mapper__.relationships.keys()
+        instance_dict = {k: v for idx, (k, v) in enumerate(self.__dict__.items()) if idx > 0 and k not in relationships}
         instance_dict['year'] = self.year
         instance_dict['tourney_name'] = self.tourney.name
         instance_dict['country_name'] = self.country.name
         return instance_dict
 
+    @staticmethod
+    def row_k_v(row: Mapping) -> dict:
+        """The k_v of a Core row of dg_event that also has the tourney_name & (event) country_name columns"""
+        instance_dict = {k: v for k, v in row.items() if k not in ('tourney_name', 'country_name')}
+        instance_dict['year'] = row['end_date'].year
+        instance_dict['tourney_name'] = row['tourney_name']
+        instance_dict['country_name'] = row['country_name']
+        return instance_dict
+
+
+class Result(Base):
+    """One player's finish at an event, normalized out of dg_event.results so per-player aggregates are indexed SQL.
+    pdga_id is not a foreign key; most finishers never become a dg_player."""
+    __tablename__ = 'dg_result'
+    id: int = Column(Integer, primary_key=True)
+    event_id: int = Column(Integer, ForeignKey('dg_event.id', ondelete='CASCADE'), nullable=False)
+    pdga_id: int = Column(Integer, nullable=True)
+    name: str = Column(String)
+    place: int = Column(Integer, nullable=True)
+    par: int = Column(Integer, nullable=True)
+    rd1: int = Column(Integer, nullable=True)
+    rd2: int = Column(Integer, nullable=True)
+    rd3: int = Column(Integer, nullable=True)
+    rd4: int = Column(Integer, nullable=True)
+    finals: int = Column(Integer, nullable=True)
+    total: int = Column(Integer, nullable=True)
+    rating: int = Column(Integer, nullable=True)
+    prize: float = Column(Float, nullable=True)
+    points: float = Column(Float, nullable=True)
+    created_ts = Column(DateTime(timezone=True), default=func.now())
+    event = relationship('Event')
+
+    __table_args__ = (Index('ix_dg_result_pdga_id', 'pdga_id'),
+                      Index('ix_dg_result_event_id_place', 'event_id', 'place'))
+
+    @property
+    def k_v(self) -> dict:
+        # the first entry in a Base instance dict is some sqlalchemy junk, hence  "idx > 0"
+        return {k: v for idx, (k, v) in enumerate(self.__dict__.items()) if idx > 0}
+
+
+class PlayerYearStats(Base):
+    """Per player, year & division (of the event) roll-up of dg_event wins & dg_result finishes.
+    Rebuilt by controller.leaderboard.refresh_player_year_aggregates whenever events are loaded."""
+    __tablename__ = 'dg_player_year_stats'
+    pdga_id: int = Column(Integer, primary_key=True)
+    year: int = Column(Integer, primary_key=True)
+    division: str = Column(String, primary_key=True)
+    wins: int = Column(Integer, default=0)
+    place_cnt: int = Column(Integer, default=0)
+    place_sum: int = Column(Integer, default=0)
+
+    @property
+    def k_v(self) -> dict:
+        # the first entry in a Base instance dict is some sqlalchemy junk, hence  "idx > 0"
+        return {k: v for idx, (k, v) in enumerate(self.__dict__.items()) if idx > 0}
+
+
+class PlayerYearPlace(Base):
+    """Histogram of finishes by place, per player, year & division, for places up to the dashboard's max top X"""
+    __tablename__ = 'dg_player_year_place'
+    pdga_id: int = Column(Integer, primary_key=True)
+    year: int = Column(Integer, primary_key=True)
+    division: str = Column(String, primary_key=True)
+    place: int = Column(Integer, primary_key=True)
+    finish_cnt: int = Column(Integer, default=0)
+
+    @property
+    def k_v(self) -> dict:
+        # the first entry in a Base instance dict is some sqlalchemy junk, hence  "idx > 0"
+        return {k: v for idx, (k, v) in enumerate(self.__dict__.items()) if idx > 0}
+
 
 class Season(Base):
     __tablename__ = 'dg_season'
@@ -102,12 +197,15 @@ class Season(Base):
     end_date: date = Column(Date, primary_key=True)
     event_designation: str = Column(String, nullable=True)
     division_str: str = Column(String, nullable=True)
-    created_ts: datetime = Column(DateTime, default=func.now())
-    lmt: datetime = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_ts: datetime = Column(DateTime(timezone=True), default=func.now())
+    lmt: datetime = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
 
     @property
     def divisions(self) -> list[str]:
-        div_str = self.division_str
+        return self.divisions_from_str(self.division_str)
+
+    @staticmethod
+    def divisions_from_str(div_str: str) -> list[str]:
         return ['MPO', 'FPO'] if div_str == 'MF' else ['MPO'] if div_str == 'M' else ['FPO']
 
     @property
@@ -117,6 +215,11 @@ class Season(Base):
         instance_dict['divisions'] = self.divisions
         return instance_dict
 
+    @staticmethod
+    def row_k_v(row: Mapping) -> dict:
+        """The k_v of a Core row of dg_season, w/o building an instance"""
+        return {**row, 'divisions': Season.divisions_from_str(row['division_str'])}
+
 
 if __name__ == '__main__':
     if input('Are you sure you want to drop and create these tables? (Y/n) ') == 'Y':
@@ -50,3 +50,5 @@ states = {
     "WI": "Wisconsin",
     "WY": "Wyoming"
 }
+
+state_codes_by_name = {name: code for code, name in states.items()}
@@ -0,0 +1,163 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Callable, Hashable
+
+
+class StreamlitData:
+    MEMO_MAX_SIZE = 64
+
+    def __init__(self, records: list[dict], filters: list[str], groupers: dict[str: tuple[str, ...]]):
+        self._dirty_data = records
+        self.data: list[dict] = self.clean_data()
+        self._indexes: dict[str: dict] = {}  # column -> {value: set of row positions in self.data}
+        self._sort_orders: dict[str: tuple] = {}  # column -> (positions sorted desc, rank of each position, keys asc)
+        self.filters = filters
+        self.groupers = groupers
+        self.filter_dropdowns: dict = self.populate_filter_dropdowns()
+        self.filtered_data: list[dict] = self.data.copy()
+        self.filter_key: Hashable = None  # identifies the filter state behind self.filtered_data
+        self.grouped_data: list[dict] | None = None
+        self._memo: OrderedDict = OrderedDict()
+
+    @property
+    def players(self) -> list:
+        return sorted({p['player_w_flag'] for p in self.filtered_data})
+
+    @property
+    def years(self) -> list:
+        return sorted({r['event_year'] for r in self.filtered_data if r.get('event_year')})
+
+    @staticmethod
+    def freeze(value: Any) -> Hashable:
+        """A hashable equivalent of (nested) filter values, so filter state can key the memo"""
+        if isinstance(value, dict):
+            return tuple(sorted((k, StreamlitData.freeze(v)) for k, v in value.items()))
+        if isinstance(value, (list, tuple, set)):
+            return tuple(StreamlitData.freeze(v) for v in value)
+        return value
+
+    def memoize(self, name: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the derived artifact called name for key, computing it only on a miss.
+        Least recently used entries are evicted beyond MEMO_MAX_SIZE. Callers must not mutate what they get back."""
+        memo_key = (name, key)
+        if memo_key in self._memo:
+            self._memo.move_to_end(memo_key)
+            return self._memo[memo_key]
+        value = self._memo[memo_key] = compute()
+        if len(self._memo) > self.MEMO_MAX_SIZE:
+            self._memo.popitem(last=False)
+        return value
+
+    def clean_data(self) -> list[dict]:
+        designation_map = {'DGPT +': 'Elevated', 'Elite +': 'Elevated',
+                           'Elite': 'Standard', 'DGPT Undesignated': 'Standard', 'Silver': 'Standard'}
+        cleaned_data = []
+        for row in self._dirty_data:
+            # create/clean/map some columns
+            row['player_w_flag'] = f"{row['player_full_name']}  {row['country_flag_emoji']}"
+            row['country_w_flag'] = f"{row['country_name']}  {row['country_flag_emoji']}"
+            row['event_state'] = '' if not row['event_state'] else row['event_state']
+            # group the designations
+            row['event_designation_map'] = designation_map.setdefault(row['event_designation'],
+                                                                      row['event_designation'])
+            cleaned_data.append(row)
+        return cleaned_data
+
+    def _index(self, key: str) -> dict:
+        """Inverted index of a column, built once per instance: {value: {row position, ...}}"""
+        if key not in self._indexes:
+            index = defaultdict(set)
+            for i, r in enumerate(self.data):
+                if key in r:
+                    index[r[key]].add(i)
+            self._indexes[key] = dict(index)
+        return self._indexes[key]
+
+    def _sort_order(self, key: str) -> tuple[list[int], list[int], list]:
+        """Row positions sorted (stably) by a column descending, each position's rank in that order,
+        and the column's values ascending for binary searches.  Built once per instance & column."""
+        if key not in self._sort_orders:
+            order_desc = sorted(range(len(self.data)), key=lambda i: self.data[i][key], reverse=True)
+            rank = [0] * len(self.data)
+            for r, i in enumerate(order_desc):
+                rank[i] = r
+            keys_asc = [self.data[i][key] for i in reversed(order_desc)]
+            self._sort_orders[key] = order_desc, rank, keys_asc
+        return self._sort_orders[key]
+
+    def populate_filter_dropdowns(self) -> dict[str: list]:
+        return {f: sorted(self._index(f), key=lambda x: (x is None, x)) for f in self.filters}
+
+    def filter_data(self, filters: dict, sort_key: str = None, time_period_col: str = None) -> None:
+        """Accepts a dictionary whose keys are 'columns' and whose list of values are the 'column' data.
+        Data that meets the provided filters is stored in self.filtered_data, ordered by date descending.
+        'Special keys': If the filter's value is 'All', that filter is ignored.
+        If the key is 'time_period', it expects a tuple of two dates, saving dates that are between (inclusive).
+        This is done on the parameter 'time_period_col'.
+        Each filter is a lookup in a column's inverted index (a binary search for the time period), the matches are
+        intersected as sets of row positions, and self.filtered_data references the rows of self.data (no copies).
+        Results are memoized by filter state, & self.filter_key identifies that state for dependent artifacts."""
+        self.filter_key = (self.freeze(filters), sort_key, time_period_col)
+        self.filtered_data = self.memoize('filtered', self.filter_key,
+                                          lambda: self._filter_data(filters, sort_key, time_period_col))
+
+    def _filter_data(self, filters: dict, sort_key: str = None, time_period_col: str = None) -> list[dict]:
+        positions: set[int] | None = None  # None means every row
+        for key, value in filters.items():
+            if not value or value == 'All':
+                continue
+            if key == 'time_period':
+                order_desc, _, keys_asc = self._sort_order(time_period_col)
+                lo, hi = bisect_left(keys_asc, value[0]), bisect_right(keys_asc, value[1])
+                count = len(keys_asc)
+                matches = set(order_desc[count - hi:count - lo])
+            else:
+                index = self._index(key)
+                values = [value] if isinstance(value, str) else value  # radio buttons give a single value
+                matches = set().union(*(index.get(v, ()) for v in values))
+            positions = matches if positions is None else positions & matches
+
+        if sort_key:
+            order_desc, rank, _ = self._sort_order(sort_key)
+            ordered = order_desc if positions is None else sorted(positions, key=rank.__getitem__)
+        else:
+            ordered = range(len(self.data)) if positions is None else sorted(positions)
+        return [self.data[i] for i in ordered]
+
+    def group_data_by_player_year(self) -> None:
+        """Returns list of dicts, such as:
+        {'player_w_flag': 'Kristin Tattar  :flag-ee', 'event_year': 2021, 'season_wins: 3, 'cumulative_wins': 4}
+        There is a row for every player-year combination (ordered by year, then player), including 0-win seasons.
+        The wins are counted in a single pass over the filtered data & memoized by filter state."""
+        self.grouped_data = self.memoize('grouped_by_player_year', self.filter_key, self._group_data_by_player_year)
+
+    def _group_data_by_player_year(self) -> list[dict]:
+        season_wins = Counter((r['player_w_flag'], r['event_year']) for r in self.filtered_data)
+        players = self.players
+        cumulative_totals = dict.fromkeys(players, 0)  # Cumulative wins by player
+
+        grouped = []
+        for year in self.years:
+            for player in players:
+                wins = season_wins.get((player, year), 0)
+                cumulative_totals[player] += wins
+                grouped.append({'player_w_flag': player, 'event_year': year,
+                                'season_wins': wins, 'cumulative_wins': cumulative_totals[player]})
+        return grouped
+
+    def group_and_count(self, grouper_key: str, desired_count_key: str) -> list[dict]:
+        """Accepts a column on which to group; returns a list of dicts whose count has a key of the desired count key"""
+        values_to_group = [r[grouper_key] for r in self.filtered_data]
+        counter = Counter(values_to_group)
+        return [{grouper_key: group, desired_count_key: count} for group, count in counter.items()]
+
+    @staticmethod
+    def rank_data(unranked_data: list[dict], value_key: str) -> list[dict] | None:
+        """Appends a key called 'rank' with a value of the rank; it handles ties"""
+        if not unranked_data:
+            return None
+        sorted_data = sorted(unranked_data, key=lambda x: x[value_key], reverse=True)
+        sorted_data[0]['rank'] = 1
+        for i, row in enumerate(sorted_data[1:], start=2):
+            row['rank'] = i if row[value_key] != sorted_data[i-2][value_key] else sorted_data[i-2]['rank']
+        return sorted_data
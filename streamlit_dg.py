@@ -1,12 +1,15 @@
-from collections import Counter, defaultdict
 from datetime import date
 import time
 
 import altair as alt
 from controller.event import EventResults
+from controller.leaderboard import (aggregate_years, get_avg_finish_leaders, get_top_finish_leaders,
+                                    get_win_leaders)
+from controller.result import get_avg_finishes, get_top_finish_counts
 import matplotlib.pyplot as plt
 import pandas as pd
 import streamlit as st
+from streamlit_data import StreamlitData
 from utilnacki.dates import TIME_PERIODS
 
 # DATA_URL = 'https://disc-golf.onrender.com/api/results_flat'
@@ -18,119 +21,21 @@ st.session_state['filters'] = {}
 st.session_state['groupers'] = {}
 
 
-class StreamlitData:
-    def __init__(self, records: list[dict], filters: list[str], groupers: dict[str: tuple[str, ...]]):
-        self._dirty_data = records
-        self.data: list[dict] = self.clean_data()
-        self.filters = filters
-        self.groupers = groupers
-        self.filter_dropdowns: dict = self.populate_filter_dropdowns()
-        self.filtered_data: list[dict] = self.data.copy()
-        self.grouped_data: list[dict] | None = None
-
-    @property
-    def players(self) -> list:
-        return sorted({p['player_w_flag'] for p in self.filtered_data})
-
-    @property
-    def years(self) -> list:
-        return sorted({r['event_year'] for r in self.filtered_data if r.get('event_year')})
-
-    def clean_data(self) -> list[dict]:
-        designation_map = {'DGPT +': 'Elevated', 'Elite +': 'Elevated',
-                           'Elite': 'Standard', 'DGPT Undesignated': 'Standard', 'Silver': 'Standard'}
-        cleaned_data = []
-        for row in self._dirty_data:
-            # create/clean/map some columns
-            row['player_w_flag'] = f"{row['player_full_name']}  {row['country_flag_emoji']}"
-            row['country_w_flag'] = f"{row['country_name']}  {row['country_flag_emoji']}"
-            row['event_state'] = '' if not row['event_state'] else row['event_state']
-            # group the designations
-            row['event_designation_map'] = designation_map.setdefault(row['event_designation'],
-                                                                      row['event_designation'])
-            cleaned_data.append(row)
-        return cleaned_data
-
-    def populate_filter_dropdowns(self) -> dict[str: list]:
-        filter_dropdowns = {f: set() for f in self.filters}
-        for r in self.data:
-            for k, v in r.items():
-                if k in self.filters:
-                    filter_dropdowns[k].add(v)
-        return {k: sorted(v, key=lambda x: (x is None, x)) for k, v in filter_dropdowns.items()}
-
-    def filter_data(self, filters: dict, sort_key: str = None, time_period_col: str = None) -> None:
-        """Accepts a dictionary whose keys are 'columns' and whose list of values are the 'column' data.
-        Data that meets the provided filters is stored in self.filtered_data, ordered by date descending.
-        'Special keys': If the filter's value is 'All', that filter is ignored.
-        If the key is 'time_period', it expects a tuple of two dates, saving dates that are between (inclusive).
-        This is done on the parameter 'time_period_col'. """
-        if not filters:
-            self.filtered_data = self.data
-        filtered = self.data.copy()
-        for key, value in filters.items():
-            if value and value != 'All':
-                if key == 'time_period':
-                    filtered = [entry for entry in filtered if value[0] <= entry[time_period_col] <= value[1]]
-                else:
-                    filtered = [entry for entry in filtered if entry[key] in value]
-        self.filtered_data = sorted(filtered, key=lambda x: x[sort_key], reverse=True) if sort_key else filtered
-
-    def group_data_by_player_year(self) -> None:
-        """Returns list of dicts, such as:
-        {'player_w_flag': 'Kristin Tattar  :flag-ee', 'event_year': 2021, 'season_wins: 3, 'cumulative_wins': 4}"""
-        grouped = defaultdict(lambda: {'player_w_flag': None, 'event_year': None, 'season_wins': 0, 'cumulative_wins': 0})
-        cumulative_totals = defaultdict(int)  # Cumulative wins by player
-
-        # For each player and year combination, process and update wins
-        for year in self.years:
-            for player in self.players:
-                key = (player, year)
-
-                # Filter out records for this player-year if present
-                player_records = [r for r in self.filtered_data if r['player_w_flag'] == player and r['event_year'] == year]
-
-                # If there are records for this player-year, count the wins
-                wins = len(player_records)
-                if wins > 0:
-                    cumulative_totals[player] += wins  # Update cumulative wins
-
-                # Update grouped data for the player-year with wins and cumulative wins
-                grouped[key]['player_w_flag'] = player
-                grouped[key]['event_year'] = year
-                grouped[key]['season_wins'] = wins
-                grouped[key]['cumulative_wins'] = cumulative_totals[player]
-
-        # Convert the grouped data back to a list
-        self.grouped_data = list(grouped.values())
-
-    def group_and_count(self, grouper_key: str, desired_count_key: str) -> list[dict]:
-        """Accepts a column on which to group; returns a list of dicts whose count has a key of the desired count key"""
-        values_to_group = [r[grouper_key] for r in self.filtered_data]
-        counter = Counter(values_to_group)
-        return [{grouper_key: group, desired_count_key: count} for group, count in counter.items()]
-
-    @staticmethod
-    def rank_data(unranked_data: list[dict], value_key: str) -> list[dict] | None:
-        """Appends a key called 'rank' with a value of the rank; it handles ties"""
-        if not unranked_data:
-            return None
-        sorted_data = sorted(unranked_data, key=lambda x: x[value_key], reverse=True)
-        sorted_data[0]['rank'] = 1
-        for i, row in enumerate(sorted_data[1:], start=2):
-            row['rank'] = i if row[value_key] != sorted_data[i-2][value_key] else sorted_data[i-2]['rank']
-        return sorted_data
-
 @st.cache_data
 def get_data() -> list[dict]:
     results = EventResults()
     return results.results_flat
 
 
-data = StreamlitData(get_data()
-                     , filters=['player_w_flag', 'country_w_flag', 'player_division',
-                                'event_designation_map', 'tourney_name', 'event_state', 'event_country_name']
-                     , groupers={'event_grouper': ('player_w_flag', )})  # focused on just grouping by player wins
+# One instance per browser session: its indexes & memoized artifacts (keyed by filter state) survive reruns,
+# so changing one widget only recomputes the panels that depend on it
+if 'data' not in st.session_state:
+    st.session_state['data'] = StreamlitData(get_data()
+                                             , filters=['player_w_flag', 'country_w_flag', 'player_division',
+                                                        'event_designation_map', 'tourney_name', 'event_state',
+                                                        'event_country_name']
+                                             , groupers={'event_grouper': ('player_w_flag', )})  # group by player wins
+data: StreamlitData = st.session_state['data']
 
 # FILTER & GROUP THE DATA
 # Sidebar
@@ -141,10 +46,8 @@ with st.sidebar:
     st.sidebar.header('Filters')
     st.session_state['filters']['player_w_flag'] = st.sidebar.multiselect('Winner', data.filter_dropdowns['player_w_flag'])
     st.session_state['filters']['country_w_flag'] = st.sidebar.multiselect("Winner's Country", data.filter_dropdowns['country_w_flag'])
-    data.filter_dropdowns['player_division'].append('All')
-    st.session_state['filters']['player_division'] = st.sidebar.radio('Division', data.filter_dropdowns['player_division'], horizontal=True, index=2)
-    data.filter_dropdowns['event_designation_map'].append('All')
-    st.session_state['filters']['event_designation_map'] = st.sidebar.radio('Designation', data.filter_dropdowns['event_designation_map'], horizontal=True, index=3)
+    st.session_state['filters']['player_division'] = st.sidebar.radio('Division', data.filter_dropdowns['player_division'] + ['All'], horizontal=True, index=2)
+    st.session_state['filters']['event_designation_map'] = st.sidebar.radio('Designation', data.filter_dropdowns['event_designation_map'] + ['All'], horizontal=True, index=3)
     st.session_state['filters']['tourney_name'] = st.sidebar.multiselect('Tournament', data.filter_dropdowns['tourney_name'])
 
     # Place state & country side-by-side sidebar into two columns
@@ -158,10 +61,17 @@ with st.sidebar:
 
 data.filter_data(st.session_state['filters'], sort_key='event_end_date', time_period_col='event_end_date')
 data.group_data_by_player_year()
-players_and_wins: list[dict] = data.group_and_count('player_w_flag', 'wins')
-ranked_players = data.rank_data(players_and_wins, 'wins')
+ranked_players = data.memoize('ranked_wins', data.filter_key,
+                              lambda: data.rank_data(data.group_and_count('player_w_flag', 'wins'), 'wins'))
 top_7_names = [d['player_w_flag'] for d in ranked_players if d['rank'] <= 7]
-df_ranked = pd.DataFrame([r for r in data.grouped_data if r['player_w_flag'] in top_7_names])
+df_ranked = data.memoize('df_ranked', data.filter_key,
+                         lambda: pd.DataFrame([r for r in data.grouped_data if r['player_w_flag'] in top_7_names]))
+
+# When only division & whole years are filtered, the leaderboards are answered from the pre-rolled player-year rows
+agg_years = aggregate_years(st.session_state['filters'])
+agg_divisions = [d for d in [st.session_state['filters']['player_division']] if d and d != 'All']
+winner_names = data.memoize('winner_names', data.filter_key,
+                            lambda: {e['event_winner_id']: e['player_w_flag'] for e in data.filtered_data})
 
 
 # DISPLAY THE DATA
@@ -220,7 +130,12 @@ with col_l.container():
     st.caption('DGPT Era')
     lb_col_config = {'rank': 'Rank', 'player_w_flag': 'Winner', 'wins': 'Wins'}
     column_order = list(lb_col_config.keys())
-    table_data = data.rank_data(data.group_and_count('player_w_flag', 'wins'), 'wins')
+    if agg_years:
+        table_data = data.memoize('wins_table', data.filter_key, lambda: data.rank_data(
+            [{'player_w_flag': winner_names.get(pdga_id, f'PDGA#: {pdga_id}'), 'wins': wins}
+             for pdga_id, wins in get_win_leaders(agg_divisions, agg_years)], 'wins'))
+    else:
+        table_data = ranked_players
     st.dataframe(table_data, column_order=column_order, column_config=lb_col_config, hide_index=True)
 
 
@@ -228,26 +143,24 @@ with col_l.container():
 with col_c.container():
     st.header('Lowest Avg Finish')
     st.caption('Min 10 events')
-    player_finishes = defaultdict(list)
-    # {73986: [2, 1, 3, 5, 1], ...}
-    for e in data.filtered_data:
-        if e['event_results']:
-            for player_result in e['event_results']:
-                player_finishes[player_result['PDGA#']].append(player_result['Place'])
-
-    # {73986: 2.4, ...}
-    player_avg_finish = {}
-    for pdga_id, finishes in player_finishes.items():
-        if len(finishes) >= 10:
-            player_avg_finish[pdga_id] = round(sum(finishes) / len(finishes), 1)
-
     top_x = 10
-    p_avg_finish_top_10: list[tuple[int, float]] = sorted(player_avg_finish.items(), key=lambda item: item[1])[:top_x]
-
-    final_avg_finish = []
-    for pdga_id, avg_finish in p_avg_finish_top_10:
-        player_w_flag = next((e['player_w_flag'] for e in data.filtered_data if e['event_winner_id'] == pdga_id), None)
-        final_avg_finish.append({'player_w_flag': player_w_flag or f'PDGA#: {pdga_id}', 'avg_finish': avg_finish})
+    filtered_event_ids = [e['event_id'] for e in data.filtered_data]
+
+    def avg_finish_table() -> list[dict]:
+        # [(73986, 2.4), ...] from the indexed dg_result table
+        if agg_years:
+            p_avg_finish_top_10 = get_avg_finish_leaders(agg_divisions, agg_years, min_events=10, limit=top_x)
+        else:
+            p_avg_finish_top_10: list[tuple[int, float]] = get_avg_finishes(filtered_event_ids, min_events=10,
+                                                                            limit=top_x)
+        final_avg_finish = []
+        for pdga_id, avg_finish in p_avg_finish_top_10:
+            player_w_flag = winner_names.get(pdga_id)
+            final_avg_finish.append({'player_w_flag': player_w_flag or f'PDGA#: {pdga_id}',
+                                     'avg_finish': round(avg_finish, 1)})
+        return final_avg_finish
+
+    final_avg_finish = data.memoize('avg_finish_table', data.filter_key, avg_finish_table)
 
     st.dataframe(final_avg_finish, column_config={'player_w_flag': 'Player', 'avg_finish': 'Avg Place'})
 
@@ -259,23 +172,23 @@ with col_r.container():
     max_fin = header_col_c.number_input('x', min_value=1, max_value=20, value=10, step=1, label_visibility='hidden')
     header_col_r.header('Finishes')
     st.caption('Enter a value between 1 and 20 and hit enter or deselect')
-    player_finishes = defaultdict(int)
-    # {73986: 10, ...}
-    for e in data.filtered_data:
-        if not e['event_results']:
-            continue
-        for player_result in e['event_results']:
-            if player_result['Place'] <= max_fin:
-                player_finishes[player_result['PDGA#']] += 1
-
     top_x = 10
-    p_top_x_finishes: list[tuple[int, float]] = sorted(player_finishes.items(),
-                                                       key=lambda item: item[1], reverse=True)[:top_x]
 
-    final_top_finishes = []
-    for pdga_id, top_finishes in p_top_x_finishes:
-        player_w_flag = next((e['player_w_flag'] for e in data.filtered_data if e['event_winner_id'] == pdga_id), None)
-        final_top_finishes.append({'player_w_flag': player_w_flag or f'PDGA#: {pdga_id}', 'top_finishes': top_finishes})
+    def top_finishes_table() -> list[dict]:
+        # [(73986, 10), ...] from the indexed dg_result table
+        if agg_years:
+            p_top_x_finishes = get_top_finish_leaders(max_fin, agg_divisions, agg_years, limit=top_x)
+        else:
+            p_top_x_finishes: list[tuple[int, int]] = get_top_finish_counts(max_fin, filtered_event_ids, limit=top_x)
+        final_top_finishes = []
+        for pdga_id, top_finishes in p_top_x_finishes:
+            player_w_flag = winner_names.get(pdga_id)
+            final_top_finishes.append({'player_w_flag': player_w_flag or f'PDGA#: {pdga_id}',
+                                       'top_finishes': top_finishes})
+        return final_top_finishes
+
+    # only this panel depends on the Top X input
+    final_top_finishes = data.memoize('top_finishes_table', (data.filter_key, max_fin), top_finishes_table)
 
     st.dataframe(final_top_finishes, column_config={'player_w_flag': 'Player      ', 'top_finishes': 'Top Finishes'})
 
@@ -1,8 +1,10 @@
-from controller.country import get_countries
-from controller.event import get_completed_unloaded_events, get_last_added_event, write_event_to_db
-from controller.player import NewPlayer, get_last_added_player, get_all_players
+from controller.country import country_code_from_name, get_countries
+from controller.event import get_completed_unloaded_events, get_last_added_event, load_events, write_event_to_db
+from controller.player import Division, NewPlayer, get_last_added_player, get_all_players, update_player_photos
+from controller.player_import import import_players, rows_from_lines
 from controller.player_scrape_pdga_id import scrape_id_and_country
 from controller.tournament import create_tourney, get_all_tourneys
+from datetime import timedelta
 import streamlit as st
 
 st.set_page_config(page_title='DG Admin', page_icon=':flying_disc:', layout='wide')
@@ -64,17 +66,21 @@ with col_l:
     tourney_name, end_date = get_last_added_event()
     st.caption(f"The last event added was {tourney_name} from {end_date}")
 
+    add_players = st.checkbox('Add missing players from the leaderboards', value=False)
     if st.button('Load Completed Events'):
         cues: list[dict] = get_completed_unloaded_events()
         if not cues:
             st.info("No completed events to load")
         else:
-            for cue in cues:
-                try:
-                    write_event_to_db(**cue)
-                    st.success(f"Added PDGA Event # {cue['pdga_event_id']} for {cue['div']}")
-                except ValueError as e:
-                    st.error(e)
+            with st.spinner(f"Scraping & loading {len(cues)} event divisions"):
+                load_results = load_events(cues, add_players=add_players)
+            for r in load_results:
+                if r.ok:
+                    st.success(f"Added PDGA Event # {r.pdga_event_id} for {r.div}")
+                else:
+                    st.error(r.error)
+                for warning in r.warnings:
+                    st.warning(warning)
 
 
 with col_l.container():
@@ -85,13 +91,16 @@ with col_l.container():
     designation = right.selectbox('Designation', ['Standard', 'Elevated', 'Major'], index=None)
     tourney_id = left.number_input('Tourney ID', min_value=1, placeholder=None)
     div = right.selectbox('Division', ['MPO', 'FPO'])
+    manual_add_players = form_manual_event_load.checkbox('Add missing players from the leaderboard', value=False)
 
     if form_manual_event_load.form_submit_button('Load'):
         if not pdga_event_id > 1 or not designation or not tourney_id > 1 or not div:
             st.error('Please enter all values')
             exit()
         try:
-            write_event_to_db(pdga_event_id, designation, tourney_id, div)
+            for warning in write_event_to_db(pdga_event_id, designation, tourney_id, div,
+                                             add_players=manual_add_players):
+                st.warning(warning)
         except ValueError as e:
             st.error(e)
 
@@ -103,10 +112,11 @@ with col_r.container():
     last = co_last.text_input('Last Name')
     co_btn, co_pdga_id, co_country = form_player_lookup.columns([2, 1, 1])
     btn_search = co_btn.form_submit_button('Search')
-    pdga_id, country = None, None
+    pdga_id, country, country_code = None, None, None
     if btn_search:
-        if scrape_id_and_country(first, last):
-            pdga_id, country = scrape_id_and_country(first, last)
+        if found := scrape_id_and_country(first, last):
+            pdga_id, country = found
+            country_code = country_code_from_name(country)
             co_pdga_id.subheader(pdga_id)
             co_country.subheader(country)
         else:
@@ -124,7 +134,7 @@ with col_r.container():
               'last_name': co3.text_input('Last Name', value=last if last else None),
               'division': form_add_player.radio('Dvision', ['MPO', 'FPO'], horizontal=True),
               'photo_url': form_add_player.text_input('Photo URL (presently unsupported)', disabled=True),
-              'country_code': form_add_player.text_input('Country Code (two-digit)', max_chars=2)}
+              'country_code': form_add_player.text_input('Country Code (two-digit)', max_chars=2, value=country_code)}
 
     form_add_player_submit = form_add_player.form_submit_button('Add Player')
     if form_add_player_submit:
@@ -138,6 +148,36 @@ with col_r.container():
         NewPlayer(**player)
         st.rerun()
 
+with col_r.container():
+    st.header('Bulk Add Players')
+    form_bulk_add = st.form('Bulk Add Players')
+    bulk_lines = form_bulk_add.text_area('One PDGA # or "First Last" per line')
+    bulk_division = form_bulk_add.radio('Division', ['MPO', 'FPO'], horizontal=True)
+    if form_bulk_add.form_submit_button('Add Players'):
+        with st.spinner('Looking up players on pdga.com...'):
+            bulk_result = import_players(rows_from_lines(bulk_lines.splitlines(), Division(bulk_division)))
+        if bulk_result.inserted:
+            st.success(f"Added PDGA #'s {', '.join(map(str, bulk_result.inserted))}")
+        if bulk_result.already_existed:
+            st.info(f"Already in the database: {', '.join(map(str, bulk_result.already_existed))}")
+        for failed_row in bulk_result.failed:
+            st.error(f"{failed_row.label}: {failed_row.error}")
+
+
+with col_r.container():
+    st.header('Refresh Player Photos')
+    form_photos = st.form('Refresh Player Photos')
+    stale_days = form_photos.number_input('Skip players checked in the last N days (0 checks everyone)',
+                                          min_value=0, value=30)
+    if form_photos.form_submit_button('Refresh Photos'):
+        photo_progress = st.progress(0.0, text='Checking player photos on pdga.com...')
+        photo_errors = update_player_photos(
+            stale_after=timedelta(days=stale_days) if stale_days else None,
+            progress=lambda done, total: photo_progress.progress(done / total, text=f'Checked {done} of {total}'))
+        photo_progress.empty()
+        st.success('Player photos refreshed')
+        for photo_pdga_id, photo_error in photo_errors.items():
+            st.warning(f"PDGA # {photo_pdga_id}: {photo_error}")
 
 with col_r.container():
     st.header('Add Tournament')
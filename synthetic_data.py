@@ -0,0 +1,103 @@
+"""Synthetic players, tourneys, seasons & events w full MPO/FPO leaderboards, shaped like the real data (DGPT since
+2016) but at any multiple of its size, for benchmarking.  Scale grows the events per season, the tourneys & the
+player pool; the seasons stay 2016-2024, so the per-year & per-player paths get denser, like they will in real life.
+Run: DB_MODE=local LOCAL_DB_PATH=synthetic.db python synthetic_data.py [scale]"""
+from datetime import date, datetime, timedelta
+import random
+
+from controller.result import result_rows
+from db import engine
+from models import Event, Player, Result, Season, Tournament
+
+SEASONS = range(2016, 2025)
+WEEKENDS_PER_SEASON = 19  # today: ~170 weekends w an MPO & an FPO event, i.e. ~335 events
+TOURNEYS = 59
+PLAYERS = {'MPO': 450, 'FPO': 150}  # everyone who shows up on the leaderboards
+LEADERBOARD_SIZES = {'MPO': 120, 'FPO': 60}
+DESIGNATIONS = ('Elite', 'Elite', 'Silver', 'DGPT Undesignated', 'Major', 'Standard', 'Elite +', 'Elevated')
+LOCATIONS = (('Emporia', 'KS', 'US'), ('Charlotte', 'NC', 'US'), ('Peoria', 'IL', 'US'), ('Austin', 'TX', 'US'),
+             ('Smugglers Notch', 'VT', 'US'), ('Portland', 'OR', 'US'), ('Tampere', None, 'FI'),
+             ('Sula', None, 'NO'), ('Jonkoping', None, 'SE'), ('Adelaide', None, 'AU'))
+PLAYER_COUNTRIES = ('US',) * 14 + ('FI', 'EE', 'SE', 'NO', 'DE', 'CA')
+CREATED_TS = datetime(2024, 8, 11, 5, 7, 22)
+
+
+def leaderboard(rnd: random.Random, entrants: list[dict]) -> list[dict]:
+    """A cleaned (see event_pdga.clean_result_row) 3 round leaderboard: better rated players tend to finish higher"""
+    scored = []
+    for player in entrants:
+        rounds = [round(rnd.gauss(60 - (player['rating'] - 1000) / 10, 3)) for _ in range(3)]
+        scored.append((sum(rounds), rounds, player))
+    scored.sort(key=lambda s: s[0])
+    rows, par = [], 180
+    for place, (total, rounds, player) in enumerate(scored, start=1):
+        rows.append({'Place': place, 'Points': float(max(0, 100 - place)), 'Name': player['name'],
+                     'PDGA#': player['pdga_id'], 'Rating': player['rating'], 'Par': total - par,
+                     'Rd1': rounds[0], 'Rd2': rounds[1], 'Rd3': rounds[2], 'Total': total,
+                     'Prize': float(max(0, 20 - place) * 250)})
+    return rows
+
+def generate(scale: float = 1, leaderboards: bool = True, seed: int = 0) -> dict[str, list[dict]]:
+    """Rows per table name (dg_tourney, dg_player, dg_season, dg_event & dg_result) at scale × today's size.
+    Without leaderboards, events have no results & there are no dg_result rows, which is much faster to build."""
+    rnd = random.Random(seed)
+    tourney_cnt = max(1, round(TOURNEYS * scale))
+    weekends = max(1, round(WEEKENDS_PER_SEASON * scale))
+    tourneys = [{'id': i, 'parent_id': i, 'name': f'Synthetic Open {i}', 'effective_date': date(2016, 1, 1),
+                 'expiry_date': None, 'created_ts': CREATED_TS, 'lmt': CREATED_TS} for i in range(1, tourney_cnt + 1)]
+
+    pools, players = {}, []
+    pdga_id = 10000
+    for division, player_cnt in PLAYERS.items():
+        pools[division] = []
+        for _ in range(max(LEADERBOARD_SIZES[division], round(player_cnt * scale))):
+            pdga_id += rnd.randrange(1, 40)
+            player = {'pdga_id': pdga_id, 'first_name': f'First{pdga_id}', 'last_name': f'Last{pdga_id}',
+                      'division': division, 'photo_url': None, 'country_code': rnd.choice(PLAYER_COUNTRIES),
+                      'created_ts': CREATED_TS, 'lmt': CREATED_TS}
+            players.append(player)
+            pools[division].append({'pdga_id': pdga_id, 'name': f'First{pdga_id} Last{pdga_id}',
+                                    'rating': round(rnd.gauss(980, 25))})
+        pools[division].sort(key=lambda p: -p['rating'])
+
+    seasons, events, results = [], [], []
+    for year in SEASONS:
+        for weekend in range(weekends):
+            end_date = date(year, 3, 1) + timedelta(days=weekend * 240 // weekends)
+            tourney_id = (weekend + year) % tourney_cnt + 1
+            designation = rnd.choice(DESIGNATIONS)
+            city, state, country_code = rnd.choice(LOCATIONS)
+            pdga_event_id = 20000 + len(seasons)
+            seasons.append({'tourney_id': tourney_id, 'pdga_event_id': pdga_event_id, 'end_date': end_date,
+                            'event_designation': designation, 'division_str': 'MF',
+                            'created_ts': CREATED_TS, 'lmt': CREATED_TS})
+            for division, pool in pools.items():
+                # the top of the ratings shows up most weekends, the rest now & then
+                regulars = pool[:LEADERBOARD_SIZES[division] // 2]
+                entrants = regulars + rnd.sample(pool[len(regulars):], LEADERBOARD_SIZES[division] - len(regulars))
+                board = leaderboard(rnd, entrants)
+                event_id = len(events) + 1
+                events.append({'id': event_id, 'governing_body': 'PDGA' if designation == 'Major' else 'DGPT',
+                               'designation': designation, 'start_date': end_date - timedelta(days=2),
+                               'end_date': end_date, 'winner_id': board[0]['PDGA#'], 'tourney_id': tourney_id,
+                               'city': city, 'state': state, 'country_code': country_code,
+                               'pdga_event_id': pdga_event_id, 'results': board if leaderboards else None,
+                               'division': division, 'created_ts': CREATED_TS, 'lmt': CREATED_TS})
+                if leaderboards:
+                    results.extend(result_rows(event_id, board))
+    return {Tournament.__tablename__: tourneys, Player.__tablename__: players, Season.__tablename__: seasons,
+            Event.__tablename__: events, Result.__tablename__: results}
+
+
+def load_synthetic(scale: float = 1, leaderboards: bool = True, seed: int = 0) -> dict[str, int]:
+    """Resets the local SQLite database to generate(...) & the real countries (see local_db.reset_local_db).
+    Returns the row count per table."""
+    from local_db import read_countries, reset_local_db
+    return reset_local_db({'country': read_countries(), **generate(scale, leaderboards, seed)})
+
+if __name__ == '__main__':
+    import sys
+    import time
+    start = time.perf_counter()
+    counts = load_synthetic(float(sys.argv[1]) if len(sys.argv) > 1 else 1)
+    print(f"Loaded {counts} into {engine.url.database} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,21 @@
+"""The tests run against a scratch local (SQLite) database built from backup_data.py, so they need no Postgres
+or network.  DB_MODE & LOCAL_DB_PATH must be set before config is first imported."""
+import os
+from pathlib import Path
+import tempfile
+
+os.environ['DB_MODE'] = 'local'
+os.environ['LOCAL_DB_PATH'] = str(Path(tempfile.mkdtemp(prefix='dg_tests_')) / 'local_dg.db')
+os.environ['PDGA_CACHE_DIR'] = ''
+
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def local_db():
+    from local_db import load_backup_snapshot
+    load_backup_snapshot()
+    yield
+    from db import engine
+    engine.dispose()
+    Path(os.environ['LOCAL_DB_PATH']).unlink(missing_ok=True)
@@ -0,0 +1,35 @@
+"""Conditional GETs: a client holding the current ETag or Last-Modified gets a 304 w no body"""
+from app import app
+import pytest
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize('url', ['/api/players', '/api/results_flat', '/api/results_flat?division=FPO&limit=5'])
+def test_etag_round_trip(client, url):
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers['ETag']
+    again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+def test_weak_etag_matches(client):
+    etag = client.get('/api/players').headers['ETag']
+    assert client.get('/api/players', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+
+
+def test_other_etag_is_a_200(client):
+    assert client.get('/api/players', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_last_modified_round_trip(client):
+    first = client.get('/api/event_results')
+    assert first.status_code == 200
+    last_modified = first.headers['Last-Modified']
+    assert client.get('/api/event_results', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get('/api/event_results',
+                      headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'}).status_code == 200
@@ -0,0 +1,27 @@
+"""Arrow snapshots must round trip every table, row for row"""
+from db_snapshot import check_round_trip, import_snapshot, write_snapshot
+from local_db import backup_rows
+from models import Event
+from sqlalchemy import create_engine, select
+
+
+def test_export_import_round_trip():
+    counts = check_round_trip()
+    assert counts['dg_event'] > 0 and counts['dg_player'] > 0
+
+
+def test_round_trip_keeps_leaderboards(tmp_path):
+    rows_by_table = backup_rows()
+    leaderboard = [{'Place': 1, 'PDGA#': 48346, 'Name': 'Drew Gibson', 'Par': -12, 'Prize': 1250.0},
+                   {'Place': 2, 'PDGA#': None, 'Name': 'Ünïcode Player', 'Par': 0, 'Prize': 0}]
+    rows_by_table['dg_event'] = [{**event, 'results': leaderboard} for event in rows_by_table['dg_event']]
+    write_snapshot(tmp_path, rows_by_table, compression='zstd')
+
+    scratch = create_engine('sqlite://')
+    counts = import_snapshot(tmp_path, scratch)
+    assert counts == {table_name: len(rows) for table_name, rows in rows_by_table.items()}
+    with scratch.connect() as conn:
+        events = conn.execute(select(Event.id, Event.end_date, Event.results).order_by(Event.id)).all()
+    assert [(e.id, e.end_date, e.results) for e in events] == [(e['id'], e['end_date'], leaderboard)
+                                                                for e in sorted(rows_by_table['dg_event'],
+                                                                                key=lambda e: e['id'])]
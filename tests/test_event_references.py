@@ -0,0 +1,17 @@
+"""EventReferences (a batch's preloaded sets) & IndexedEventReferences (per-event lookups) must agree"""
+from controller.event import EventReferences, IndexedEventReferences
+from db import get_db_session, read_mappings
+from models import Event
+from sqlalchemy import select
+
+
+def test_event_exists_agrees_w_the_unique_key():
+    refs = EventReferences.load()
+    events = read_mappings(select(Event.tourney_id, Event.end_date, Event.division))
+    with get_db_session() as s:
+        indexed = IndexedEventReferences(s)
+        for e in events:
+            assert refs.event_exists(e['tourney_id'], e['end_date'], e['division'])
+            assert indexed.event_exists(e['tourney_id'], e['end_date'], e['division'])
+            assert not refs.event_exists(e['tourney_id'], e['end_date'], 'MA1')
+            assert not indexed.event_exists(e['tourney_id'], e['end_date'], 'MA1')
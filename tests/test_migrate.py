@@ -0,0 +1,45 @@
+"""migrate.py on a database from before dg_event.division"""
+from local_db import read_backup_data, read_countries
+from migrate import get_duplicate_events, migrate
+from models import Base, Event, Player, Tournament
+import pytest
+from sqlalchemy import MetaData, Table, create_engine, func, inspect, insert, select
+
+
+@pytest.fixture
+def old_engine():
+    """A scratch database w the backup's rows, whose dg_event has no division column or unique constraint"""
+    old_metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        Table(table.name, old_metadata,
+              *[c._copy() for c in table.columns if not (table.name == 'dg_event' and c.name == 'division')])
+    target = create_engine('sqlite://')
+    old_metadata.create_all(target)
+    backup = read_backup_data()
+    with target.begin() as conn:
+        conn.execute(insert(old_metadata.tables['country']), read_countries())
+        for name, model in (('tourneys', Tournament), ('players', Player), ('events', Event)):
+            table = old_metadata.tables[model.__tablename__]
+            conn.execute(insert(table), [{k: v for k, v in row.items() if k in table.c} for row in backup[name]])
+    return target
+
+
+def test_duplicate_events_abort_the_migration(old_engine):
+    with old_engine.connect() as conn:
+        event_cnt = conn.scalar(select(func.count()).select_from(Event.__table__))
+    with pytest.raises(ValueError, match=r'dg_event 61 won by 38008, dg_event 146 won by 45971'):
+        migrate(old_engine)
+    with old_engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Event.__table__)) == event_cnt
+    assert 'uq_dg_event_tourney_end_div' not in {i['name'] for i in inspect(old_engine).get_indexes('dg_event')}
+
+
+def test_migration_completes_once_duplicates_are_fixed(old_engine):
+    with old_engine.begin() as conn:
+        conn.execute(Event.__table__.delete().where(Event.id == 146))  # as a person would, having checked the event
+    done = migrate(old_engine)
+    assert 'added uq_dg_event_tourney_end_div' in done
+    with old_engine.connect() as conn:
+        assert not get_duplicate_events(conn)
+        assert conn.scalar(select(func.count()).where(Event.division.is_(None))) == 0
+    assert migrate(old_engine) == []
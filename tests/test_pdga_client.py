@@ -0,0 +1,73 @@
+"""PDGAClient against a stub pdga.com on localhost: revalidation, retries & the concurrency slots"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from controller.pdga_client import PDGAClient
+import pytest
+
+PAGE = 'Disc golf ' * 10_000
+ETAG = '"v1"'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen: list[tuple[str, str | None]] = []
+    failures_left = 0
+
+    def do_GET(self):
+        StubHandler.requests_seen.append((self.path, self.headers.get('If-None-Match')))
+        if self.path.startswith('/flaky') and StubHandler.failures_left:
+            StubHandler.failures_left -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            body = PAGE.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def client(base_url, tmp_path):
+    StubHandler.requests_seen.clear()
+    return PDGAClient(base_url=base_url, cache_dir=tmp_path, max_concurrency=1, min_interval_seconds=0,
+                      retries=2, backoff_factor=0)
+
+
+def test_304_returns_the_cached_text(client):
+    assert ''.join(client.iter_text('/tour/event/1')) == PAGE  # a streamed body is cached too
+    assert client.get_text('/tour/event/1') == PAGE
+    assert ''.join(client.iter_text('/tour/event/1')) == PAGE
+    assert StubHandler.requests_seen == [('/tour/event/1', None), ('/tour/event/1', ETAG), ('/tour/event/1', ETAG)]
+
+
+def test_503_is_retried(client):
+    StubHandler.failures_left = 2
+    assert client.get_text('/flaky') == PAGE
+    assert [path for path, _ in StubHandler.requests_seen] == ['/flaky'] * 3
+
+
+def test_iter_text_holds_its_slot_until_consumed(client):
+    chunks = client.iter_text('/tour/event/2', chunk_size=1024)
+    next(chunks)
+    assert not client._slots.acquire(blocking=False)  # max_concurrency=1 & the download is still open
+    ''.join(chunks)
+    assert client._slots.acquire(blocking=False)
+    client._slots.release()
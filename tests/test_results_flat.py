@@ -0,0 +1,61 @@
+"""/api/results_flat: parsing its filters, the fields= projection & keyset pagination"""
+from datetime import date
+
+from app import app
+from controller.event import EventResults, ResultFilters
+import pytest
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize('args', [{'nope': '1'}, {'fields': 'event_id,nope'}, {'fields': 'player_photo_checked_ts'},
+                                  {'year': '20x3'}, {'start_date': '2023-13-01'}, {'after': '2023-01-01'},
+                                  {'limit': '0'}, {'winner': 'abc'}])
+def test_from_args_rejects(args):
+    with pytest.raises(ValueError):
+        ResultFilters.from_args(args)
+
+
+@pytest.mark.parametrize('args', [{'nope': '1'}, {'fields': 'nope'}, {'limit': '-1'}])
+def test_bad_args_are_a_400(client, args):
+    assert client.get('/api/results_flat', query_string=args).status_code == 400
+
+
+@pytest.mark.parametrize('args, start_date, end_date', [
+    ({'year': '2023'}, date(2023, 1, 1), date(2023, 12, 31)),
+    ({'year': '2023', 'start_date': '2023-06-01'}, date(2023, 6, 1), date(2023, 12, 31)),
+    ({'year': '2023', 'end_date': '2024-03-01'}, date(2023, 1, 1), date(2023, 12, 31)),
+    ({'start_date': '2022-05-01', 'end_date': '2023-05-01'}, date(2022, 5, 1), date(2023, 5, 1)),
+])
+def test_from_args_merges_year_w_dates(args, start_date, end_date):
+    filters = ResultFilters.from_args(args)
+    assert (filters.start_date, filters.end_date) == (start_date, end_date)
+
+
+def test_from_args_parses_lists_and_cursor():
+    filters = ResultFilters.from_args({'division': 'fpo, mpo', 'winner': '48346', 'after': '2023-08-06_61',
+                                       'fields': 'event_id,player_full_name', 'limit': '5'})
+    assert filters == ResultFilters(divisions=('FPO', 'MPO'), winner_ids=(48346, ), after=(date(2023, 8, 6), 61),
+                                    fields=('event_id', 'player_full_name'), limit=5)
+
+
+def test_flat_keys_match_results_flat():
+    assert set(EventResults(ResultFilters(limit=1)).results_flat[0]) == EventResults.flat_keys()
+
+
+def test_fields_projection(client):
+    response = client.get('/api/results_flat', query_string={'fields': 'event_id,player_full_name', 'limit': 3})
+    assert response.status_code == 200
+    assert [list(row) for row in response.json] == [['event_id', 'player_full_name']] * 3
+
+
+def test_two_pages(client):
+    everything = [row['event_id'] for row in client.get('/api/results_flat?fields=event_id&division=MPO').json]
+    first = client.get('/api/results_flat?fields=event_id&division=MPO&limit=3')
+    second = client.get('/api/results_flat', query_string={'fields': 'event_id', 'division': 'MPO', 'limit': 3,
+                                                           'after': first.headers['X-Next-Cursor']})
+    assert [row['event_id'] for row in first.json + second.json] == everything[:6]
+    assert second.headers['X-Next-Cursor'] != first.headers['X-Next-Cursor']
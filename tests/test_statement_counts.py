@@ -0,0 +1,35 @@
+"""SQL statements per read: these must not grow w the number of events (i.e. no N+1 lazy loads)"""
+from controller.event import EventResults, ResultFilters, get_all_events, get_last_added_event
+from db import count_statements, get_db_session
+from models import Event
+import pytest
+from sqlalchemy.orm import joinedload
+
+
+def test_get_last_added_event_is_one_statement():
+    with count_statements() as statements:
+        get_last_added_event()
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize('limit', [1, 10, 100])
+def test_event_k_v_w_joinedload_is_one_statement(limit):
+    with count_statements() as statements:
+        with get_db_session() as s:
+            events = [e.k_v for e in s.query(Event).options(joinedload(Event.tourney), joinedload(Event.country)).
+                      limit(limit)]
+    assert len(events) == limit
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize('limit', [1, 10, 100])
+def test_event_results_is_one_statement(limit):
+    with count_statements() as statements:
+        EventResults(ResultFilters(limit=limit))
+    assert len(statements) == 1
+
+
+def test_get_all_events_is_one_statement():
+    with count_statements() as statements:
+        get_all_events()
+    assert len(statements) == 1
@@ -0,0 +1,56 @@
+"""Loading events w add_players: an event that fails the event checks must not look anyone up on pdga.com"""
+from controller import event as event_module
+from controller.event import load_events, write_event_to_db
+from controller.event_pdga import PDGAEvent
+from db import read_mappings
+from models import Event
+import pytest
+from sqlalchemy import select
+
+NEW_PDGA_ID = 999_999_999
+
+
+class FakePDGAEvent(PDGAEvent):
+    """A scraped event page w a winner who isn't in dg_player, without the download"""
+    end = None
+    status_text = PDGAEvent.PDGA_COMPLETED_EVENT_STATUS
+
+    def __init__(self, pdga_event_id: int, divisions: tuple[str, ...] = None, stream: bool = False):
+        self.pdga_event_id, self.divisions = pdga_event_id, divisions
+        self.data = {'status': self.status_text, 'dates': f'Dates: {self.end:%d-%b} to {self.end:%d-%b-%Y}',
+                     'location': 'Location: Emporia, Kansas, United States',
+                     'division_results': {div: [{'Place': 1, 'PDGA#': NEW_PDGA_ID, 'Name': 'New Winner'}]
+                                          for div in divisions}}
+
+
+@pytest.fixture
+def loaded_event(monkeypatch):
+    """An event already in dg_event; PDGAEvent scrapes a copy of it & resolve_players must not be called"""
+    event = read_mappings(select(Event.tourney_id, Event.end_date, Event.division, Event.designation).limit(1))[0]
+    monkeypatch.setattr(FakePDGAEvent, 'end', event['end_date'])
+    monkeypatch.setattr(event_module, 'PDGAEvent', FakePDGAEvent)
+
+    def resolve_players(rows):
+        raise AssertionError(f'looked up {len(rows)} players for an event that fails its checks')
+    monkeypatch.setattr(event_module, 'resolve_players', resolve_players)
+    return event
+
+
+def test_write_event_checks_for_a_duplicate_first(loaded_event):
+    with pytest.raises(ValueError, match='already exists'):
+        write_event_to_db(1, loaded_event['designation'], loaded_event['tourney_id'], loaded_event['division'],
+                          add_players=True)
+
+
+def test_write_event_checks_the_status_first(loaded_event, monkeypatch):
+    monkeypatch.setattr(FakePDGAEvent, 'status_text', 'Event report received; official ratings pending.')
+    with pytest.raises(ValueError, match="aren't finalized"):
+        write_event_to_db(1, loaded_event['designation'], loaded_event['tourney_id'], loaded_event['division'],
+                          add_players=True)
+
+
+def test_load_events_skips_players_of_invalid_events(loaded_event):
+    cues = [{'pdga_event_id': 1, 'designation': loaded_event['designation'], 'div': loaded_event['division'],
+             'tourney_id': tourney_id} for tourney_id in (loaded_event['tourney_id'], -1)]
+    results = load_events(cues, add_players=True)
+    assert ['already exists' in results[0].error, "Can't find tourney" in results[1].error] == [True, True]